@@ -0,0 +1,18 @@
+import asyncio
+import sys
+
+from src.telemetry import GroundStationClient
+
+
+async def main(decimation=1):
+    # connect to the telemetry server of a running simulation (e.g. mars_satellite.py)
+    async with GroundStationClient(decimation=decimation) as station:
+        async for frame in station.frames():
+            sats = frame.satellites
+            text = ", ".join(f"{round(alt / 1000, 1)}km {round(bat, 1)}%"
+                             for alt, bat in zip(sats["altitude"], sats["battery"]))
+            print(f"[step {frame.step}, t = {round(frame.time / 60)}min] {text}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
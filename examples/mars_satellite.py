@@ -7,6 +7,8 @@ import numpy as np
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 from src.config import *
 from src.body import Body, System, Satellite
+from src.telemetry import TelemetryServer
+from src.rendering import Renderer
 import matplotlib.pyplot as plt
 
 
@@ -73,28 +75,30 @@ def main():
     max_len = 15_000
     system_info = deque(maxlen=max_len)
 
+    # stream the satellites state to ground stations (see ground_station.py)
+    telemetry = TelemetryServer(decimation=10)
+    try:
+        telemetry.start()
+    except OSError as e:  # e.g. another simulation is using the port, publish does nothing if not started
+        print(f"Telemetry disabled: {e}")
+
+    renderer = Renderer(WINDOW, background=bg)
+
     while run:
-        run = main_step(solar_system, tick=00)
-
-        WINDOW.fill(BLACK)
-        WINDOW.blit(bg, (0, 0))
-
-        solar_system.draw_focused(WINDOW, focus=mars)
-
-        text1 = f"[{sat1.name}] battery = {round(sat1.battery, 1)}%, altitude = {round(sat1.altitude/1000, 1)}km"
-        text2 = f"[{sat2.name}] battery = {round(sat2.battery, 1)}%, altitude = {round(sat2.altitude/1000, 1)}km"
-        text3 = f"[{sat3.name}] battery = {round(sat3.battery, 1)}%, altitude = {round(sat3.altitude/1000, 1)}km"
-        # text1 = f"{sat1.name} relay = {sat1.relay}"
-        # text2 = f"{sat2.name} relay = {sat2.relay}"
-        d1 = FONT.render(text1, True, WHITE)
-        d2 = FONT.render(text2, True, WHITE)
-        d3 = FONT.render(text3, True, WHITE)
-        WINDOW.blit(d1, (10, 10))
-        WINDOW.blit(d2, (10, 30))
-        WINDOW.blit(d3, (10, 50))
-        pygame.display.update()
+        run = main_step(solar_system, tick=00, draw=False)
+
+        renderer.begin()
+        renderer.draw_system(solar_system, focus=mars)
+        for i, sat in enumerate(satellites):
+            text = f"[{sat.name}] battery = {round(sat.battery, 1)}%, altitude = {round(sat.altitude/1000, 1)}km"
+            # text = f"{sat.name} relay = {sat.relay}"
+            renderer.draw_text(i, text, (10, 10 + 20 * i))
+        renderer.end()
 
         system_info.append(solar_system.get_sat_info())
+        telemetry.publish(solar_system)
+
+    telemetry.stop()
 
     plt.gcf().set_size_inches(18, 8)
     sat1_altituds = [x[0].altitude for x in system_info]
@@ -0,0 +1,69 @@
+import os
+import tracemalloc
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+from src.config import *
+from src.body import Satellite
+
+
+N_OBJECTS = 2_000
+TRAIL_LENGTH = 1000  # default max_orbit_length, trails are measured full
+
+
+def make_satellite(i, **kwargs):
+    return Satellite(i * 1e3, 0, radius=20, color=WHITE, mass=700, initial_velocity=(0, 3e3),
+                     max_orbit_length=TRAIL_LENGTH, **kwargs)
+
+
+def legacy(i, trail_length=TRAIL_LENGTH):
+    """Layout before __slots__: per-instance __dict__ with the same attributes and a deque of (x, y) tuples."""
+    sat = make_satellite(i, trail=False)
+    names = [name for cls in Satellite.__mro__ for name in getattr(cls, "__slots__", ()) if hasattr(sat, name)]
+    obj = SimpleNamespace(**{name: getattr(sat, name) for name in names})
+    obj._orbit = deque(((float(k), float(k)) for k in range(trail_length)), maxlen=TRAIL_LENGTH)
+    return obj
+
+
+def compact(i, trail, trail_dtype=np.float64):
+    sat = make_satellite(i, trail=trail, trail_dtype=trail_dtype)
+    if trail:
+        for k in range(TRAIL_LENGTH):
+            sat._orbit.append((k, k))
+    return sat
+
+
+def bytes_per_object(factory) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory(i) for i in range(N_OBJECTS)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del objects
+    return total / N_OBJECTS
+
+
+def main():
+    layouts = [
+        ("before: __dict__, deque trail", legacy),
+        ("before: __dict__, empty deque", lambda i: legacy(i, trail_length=0)),
+        ("__slots__, float64 trail", lambda i: compact(i, trail=True)),
+        ("__slots__, float32 trail", lambda i: compact(i, trail=True, trail_dtype=np.float32)),
+        ("__slots__, no trail (headless default)", lambda i: compact(i, trail=False)),
+    ]
+    for name, factory in layouts:
+        print(f"{name:<40} {round(bytes_per_object(factory)):>8} bytes per satellite")
+
+    # the compact trails must still be drawable
+    for trail_dtype in (np.float64, np.float32):
+        sat = make_satellite(0, trail=True, trail_dtype=trail_dtype)
+        for _ in range(5):
+            sat.draw(WINDOW)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+from src.optimisation import ControllerOptimiser
+
+
+def main():
+    # short (about 3.5 days) headless simulations of the mars_satellite.py scenario
+    optimiser = ControllerOptimiser(budget=64, batch_size=8, n_steps=5000)
+    best = optimiser.run()
+
+    for evaluation in sorted(optimiser.history, key=lambda e: e.score, reverse=True)[:5]:
+        params = ", ".join(f"{name} = {round(value, 4)}" for name, value in evaluation.params.items())
+        print(f"score = {round(evaluation.score, 3)} [altitude {round(evaluation.safe_altitude, 3)}, "
+              f"battery {round(evaluation.safe_battery, 3)}, connection {round(evaluation.connection, 3)}] {params}")
+    print(f"best: {best.params}")
+
+
+if __name__ == "__main__":
+    main()
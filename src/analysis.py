@@ -0,0 +1,166 @@
+from __future__ import annotations
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+TELEMETRY_FIELDS = ("altitude", "battery", "connections", "attempted_connections", "boosting")
+
+
+def telemetry_arrays(system_info) -> dict[str, np.ndarray]:
+    """
+    Converts the recorded satellites telemetry in numeric arrays.
+
+    Parameters
+    ----------
+    system_info : np.ndarray | dict[str, np.ndarray]
+        either the object array of SatInfo with shape (steps, satellites), as saved by `mars_satellite.py`, or a dict
+        of arrays, which is returned as is.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        one float array with shape (steps, satellites) for each of the TELEMETRY_FIELDS.
+    """
+    if isinstance(system_info, dict):
+        return system_info
+    system_info = np.asarray(system_info, dtype=object)
+    return {name: np.frompyfunc(lambda info: getattr(info, name), 1, 1)(system_info).astype(float)
+            for name in TELEMETRY_FIELDS}
+
+
+def m4_indices(x: np.ndarray, y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Indices of the samples to keep to draw the trace on `n_buckets` pixel columns (M4 downsampling).
+
+    The x range is split in buckets of equal width (one per pixel column) and, for each, the first, last, minimum and
+    maximum samples are kept. The drawn line is then the same as with all the samples, spikes included, also when the
+    samples are not evenly spaced.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        sorted x coordinates of the trace.
+    y : np.ndarray
+        the trace.
+    n_buckets : int
+        number of buckets, usually the width in pixels of the plot.
+
+    Returns
+    -------
+    np.ndarray
+        sorted indices of the samples to keep (at most 4 * n_buckets).
+    """
+    n = len(y)
+    if n <= 4 * n_buckets:
+        return np.arange(n)
+
+    # first sample of each bucket, empty buckets are dropped
+    edges = np.searchsorted(x, np.linspace(x[0], x[-1], n_buckets + 1), side="left")
+    edges[-1] = n
+    edges = np.unique(edges)
+    starts, ends = edges[:-1], edges[1:]
+
+    # samples sorted by bucket, then by value: min and max are the first and last of each bucket
+    bucket = np.repeat(np.arange(len(starts)), ends - starts)
+    order = np.lexsort((y, bucket))
+    indices = np.concatenate([starts, ends - 1, order[starts], order[ends - 1]])
+    return np.unique(indices)
+
+
+def m4_downsample(x: np.ndarray, y: np.ndarray, n_buckets: int) -> tuple[np.ndarray, np.ndarray]:
+    """Downsamples the trace (x, y) keeping first, last, min and max of each bucket, see m4_indices."""
+    idx = m4_indices(x, y, n_buckets)
+    return x[idx], y[idx]
+
+
+def _pixel_width(ax) -> int:
+    """Width of the axes in pixels."""
+    return max(int(ax.get_window_extent().width), 1)
+
+
+def plot_trace(ax, x: np.ndarray, y: np.ndarray, **kwargs):
+    """Plots the trace on the axes, downsampled to the axes width."""
+    x, y = m4_downsample(np.asarray(x), np.asarray(y, dtype=float), _pixel_width(ax))
+    return ax.plot(x, y, **kwargs)
+
+
+def monitor_signal(monitor, data: dict[str, np.ndarray], sat_i: int) -> np.ndarray:
+    """
+    Evaluates a moonlight monitor (see src.monitoring) on the telemetry of one satellite.
+
+    Parameters
+    ----------
+    monitor : moonlight monitor
+        the monitor, its signal is (connections, altitude, battery).
+    data : dict[str, np.ndarray]
+        telemetry arrays, see telemetry_arrays.
+    sat_i : int
+        index of the satellite.
+
+    Returns
+    -------
+    np.ndarray
+        array with shape (changes, 2) of the monitor output, as (time, value) pairs.
+    """
+    connections = data["connections"][:, sat_i].astype(int).tolist()
+    signals = list(zip(connections, data["altitude"][:, sat_i].tolist(), data["battery"][:, sat_i].tolist()))
+    time = list(range(len(signals)))
+    return np.asarray(monitor.monitor(time, signals), dtype=float).reshape(-1, 2)
+
+
+def satisfaction_figure(data: dict[str, np.ndarray],
+                        field: str,
+                        satisfaction: list[list[tuple[str, str, np.ndarray]]],
+                        names: list[str],
+                        colors: list[str],
+                        ylabel: str,
+                        thresholds: tuple[float, ...] = (),
+                        xlabel: str = "Time (min)",
+                        ):
+    """
+    Figure with the telemetry field of all satellites on top and, below, a satisfaction plot for each satellite.
+
+    Every trace is downsampled to the width of its axes, so the drawing time does not depend on the trace length.
+
+    Parameters
+    ----------
+    data : dict[str, np.ndarray]
+        telemetry arrays, see telemetry_arrays.
+    field : str
+        the telemetry field to plot on top.
+    satisfaction : list[list[tuple[str, str, np.ndarray]]]
+        for each satellite, the (label, color, monitor output) of the monitors to plot (see monitor_signal).
+    names, colors : list[str]
+        names and colors of the satellites.
+    ylabel : str
+        label of the telemetry axis.
+    thresholds : tuple[float, ...], optional
+        values marked with dashed horizontal lines on the telemetry axis.
+    xlabel : str, optional
+        label of the time axis.
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+        the figure.
+    """
+    n_satellites = data[field].shape[1]
+    fig, axs = plt.subplots(n_satellites + 1, 1, gridspec_kw={'height_ratios': [4] + [1] * n_satellites},
+                            figsize=(16, 8), sharex=True)
+    time = np.arange(data[field].shape[0])
+
+    for sat_i in range(n_satellites):
+        plot_trace(axs[0], time, data[field][:, sat_i], color=colors[sat_i], label=names[sat_i], linewidth=0.5)
+
+        for label, color, signal in satisfaction[sat_i]:
+            plot_trace(axs[sat_i + 1], signal[:, 0], signal[:, 1], color=color, drawstyle="steps-post", label=label)
+        axs[sat_i + 1].set_ylim([-1.2, 1.2])
+        axs[sat_i + 1].set_ylabel(f"{names[sat_i]}\nSatisfaction")
+        axs[sat_i + 1].legend()
+
+    for threshold in thresholds:
+        axs[0].axhline(y=threshold, color="red", linestyle="--")
+    axs[0].set_ylabel(ylabel)
+    axs[0].legend()
+    axs[-1].set_xlabel(xlabel)
+    return fig
@@ -1,8 +1,50 @@
 from __future__ import annotations
-from collections import deque
+from operator import attrgetter
+from types import MemberDescriptorType
 import numpy as np
 from src.config import *
 from src.monitoring import SatInfo
+from src.conjunction import ConjunctionScreener, ConjunctionEvent
+from src.shadow import ShadowModel
+
+
+class Trail:
+    """
+    Fixed size ring buffer of the last drawn positions of a body, stored in a numpy array.
+
+    Methods
+    -------
+    append(point)
+        Adds a point, dropping the oldest one if full.
+    points()
+        The stored points, from the oldest.
+    """
+    __slots__ = ("_buffer", "_start", "_length")
+
+    def __init__(self, max_length: int, dtype=np.float64):
+        """Constructor Method."""
+        self._buffer = np.empty((max_length, 2), dtype=dtype)
+        self._start = 0
+        self._length = 0
+
+    def append(self, point: tuple[float, float]):
+        """Adds a point, dropping the oldest one if full."""
+        size = len(self._buffer)
+        if self._length < size:
+            self._buffer[self._length] = point
+            self._length += 1
+        else:
+            self._buffer[self._start] = point
+            self._start = (self._start + 1) % size
+
+    def points(self) -> np.ndarray:
+        """The stored points, from the oldest, shape (length, 2)."""
+        if self._length < len(self._buffer):
+            return self._buffer[:self._length]
+        return np.concatenate([self._buffer[self._start:], self._buffer[:self._start]])
+
+    def __len__(self):
+        return self._length
 
 
 class Body:
@@ -33,6 +75,7 @@ class Body:
     update(bodies)
         Updates the position and the velocity of the body.
     """
+    __slots__ = ("x", "y", "radius", "color", "mass", "vel_x", "vel_y", "_orbit", "name")
 
     def __init__(self,
                  x: float,
@@ -43,6 +86,8 @@ class Body:
                  initial_velocity=(0, 0),
                  max_orbit_length=1000,
                  name: str | None = None,
+                 trail: bool | None = None,
+                 trail_dtype=np.float64,
                  ):
         """
         Constructor Method.
@@ -67,6 +112,10 @@ class Body:
             maximum length of the orbit path (default is 1000).
         name : str, optional
             name of the body, used in representation (default is None).
+        trail : bool, optional
+            whether to store the orbit path drawn by `draw` (default is True, False in headless mode).
+        trail_dtype : np.dtype, optional
+            type of the stored orbit path, np.float32 halves its memory (default is np.float64).
         """
         self.x = x
         self.y = y
@@ -76,7 +125,9 @@ class Body:
         self.vel_x = initial_velocity[0]
         self.vel_y = initial_velocity[1]
 
-        self._orbit = deque(maxlen=max_orbit_length)
+        if trail is None:
+            trail = not HEADLESS
+        self._orbit = Trail(max_orbit_length, trail_dtype) if trail else None
         self.name = name
 
     def draw(self, window, scale=SCALE):
@@ -84,11 +135,12 @@ class Body:
         radius = RADIUS_RESIZE(self.radius) * RADIUS_SCALE
         x = self.x * scale + WIDTH / 2  # center of window is (WIDTH/2, HEIGHT/2)
         y = self.y * scale + HEIGHT / 2
-        self._orbit.append((x, y))
 
         # draw
-        if len(self._orbit) > 2:
-            pygame.draw.lines(window, self.color, False, self._orbit)
+        if self._orbit is not None:
+            self._orbit.append((x, y))
+            if len(self._orbit) > 2:
+                pygame.draw.lines(window, self.color, False, self._orbit.points().tolist())
         pygame.draw.circle(window, self.color, (x, y), radius)
 
     def draw_focused(self, window, focus: Body, scale=SCALE):
@@ -179,15 +231,24 @@ class Body:
 class Satellite(Body):
     """
     Body subclass for satellites.
-    """
-    interference_factor = 1  # factor to increase the radius of the obstacles
 
-    # battery factors
-    _solar_charge_factor = 0.02
-    _battery_discharge_factor = 0.001
-    _transmission_factor = 0.005
-    _connection_factor = 0.005
-    safe_battery_level = 20  # percentage
+    The tunable parameters (see DEFAULTS) are copied to each satellite, so they can be changed per instance or, as
+    class attributes, in subclasses.
+    """
+    DEFAULTS = {
+        "interference_factor": 1,  # factor to increase the radius of the obstacles
+        # battery factors
+        "_solar_charge_factor": 0.02,
+        "_battery_discharge_factor": 0.001,
+        "_transmission_factor": 0.005,
+        "_connection_factor": 0.005,
+        "safe_battery_level": 20,  # percentage
+    }
+
+    __slots__ = tuple(DEFAULTS) + ("motherbase", "sun", "orbit_target", "min_altitude", "max_altitude", "boost_force", "apsis_boost_time",
+                 "altitude", "_boosting_periapsis", "_boosting_apoapsis", "_periapsis_booster_steps",
+                 "_apoapsis_booster_steps", "_periapasis", "_apoapsis", "_at_periapasis", "_at_apoapsis", "battery",
+                 "connections", "attempted_connections", "relay", "transmitting")
 
     def __init__(self,
                  *args,
@@ -204,6 +265,11 @@ class Satellite(Body):
         """
         super().__init__(*args, **kwargs)
 
+        # defaults, unless overridden by a subclass
+        for name, value in Satellite.DEFAULTS.items():
+            if isinstance(getattr(type(self), name), MemberDescriptorType):
+                setattr(self, name, value)
+
         self.motherbase = motherbase
         self.sun = sun
         self.orbit_target = orbit_target
@@ -284,11 +350,17 @@ class Satellite(Body):
         y2 = target.y * scale + HEIGHT / 2
         pygame.draw.line(window, color, (x1, y1), (x2, y2), 1)
 
-    def draw_connection_focused(self, window, target: Body | None, obstacles: list[Body], focus: Body, scale=SCALE):
-        """Draws a colored line between this satellite and the target, centered around the focus."""
+    def draw_connection_focused(self, window, target: Body | None, obstacles: list[Body], focus: Body, scale=SCALE,
+                                obstructed: bool | None = None):
+        """
+        Draws a colored line between this satellite and the target, centered around the focus.
+
+        If `obstructed` is given, the path is not calculated again.
+        """
         if target is None:
             target = self.motherbase
-        obstructed = self.calculate_path(target, obstacles)
+        if obstructed is None:
+            obstructed = self.calculate_path(target, obstacles)
         color = RED if obstructed else GREEN
         x1 = (self.x - focus.x) * scale + WIDTH / 2
         y1 = (self.y - focus.y) * scale + HEIGHT / 2
@@ -296,12 +368,13 @@ class Satellite(Body):
         y2 = (target.y - focus.y) * scale + HEIGHT / 2
         pygame.draw.line(window, color, (x1, y1), (x2, y2), 1)
 
-    def _battery_update(self, obstacles: list[Body], time_delta=TIME_SCALE):
+    def _battery_update(self, obstacles: list[Body], time_delta=TIME_SCALE, sunlit: bool | float | None = None):
         """
         Updates the battery of the satellite.
 
         The battery discharges at a constant rate, but it also charges when the satellite is in the sun. The battery
-        discharges at a higher rate when the satellite is transmitting data.
+        discharges at a higher rate when the satellite is transmitting data. The charge is proportional to the
+        illuminated fraction of the sun, if known.
 
         Parameters
         ----------
@@ -310,6 +383,9 @@ class Satellite(Body):
         time_delta : float, optional
             time delta to approximate the derivative of the position and the velocity of the bodies (default is
             TIME_SCALE).
+        sunlit : bool | float, optional
+            whether the satellite is in the sun, or the illuminated fraction of the sun between 0 and 1. If None it is
+            computed from the obstacles.
         """
         # If the satellite has no battery, don't transmit
         if self.battery <= 0:
@@ -317,7 +393,7 @@ class Satellite(Body):
         else:
             self.transmitting = True
 
-        charging = not self.calculate_path(self.sun, obstacles)
+        charging = sunlit if sunlit is not None else not self.calculate_path(self.sun, obstacles)
         battery_prime = self._solar_charge_factor * charging \
                         - self.transmitting * self._transmission_factor * self.connections \
                         - self._battery_discharge_factor \
@@ -393,9 +469,13 @@ class Satellite(Body):
             self._periapasis = math.inf
             self._boosting_periapsis = False
 
-    def update(self, bodies: list[Body], time_delta=TIME_SCALE):
+    def update(self, bodies: list[Body], time_delta=TIME_SCALE, sunlit: bool | float | None = None):
         super().update(bodies, time_delta)
-        self._battery_update(bodies, time_delta)
+        self._subsystems_update(bodies, time_delta, sunlit)
+
+    def _subsystems_update(self, bodies: list[Body], time_delta=TIME_SCALE, sunlit: bool | float | None = None):
+        """Updates battery, altitude and orbit control, after the satellite has moved."""
+        self._battery_update(bodies, time_delta, sunlit)
         self._altitude_update()
         self._adjust_orbit(time_delta=time_delta)
 
@@ -408,6 +488,10 @@ class Satellite(Body):
         return SatInfo(self.altitude, self.battery, self.connections, self.attempted_connections, self.boosting)
 
 
+# satellite attributes that System.run can record
+SAT_FIELDS = ("x", "y", "vel_x", "vel_y", "altitude", "battery", "connections", "attempted_connections", "boosting")
+
+
 class System:
     """
     A class to represent a system of celestial bodies.
@@ -422,6 +506,14 @@ class System:
         pixels per meter. (only affects rendering)
     focus_scale : float
         pixels per meter when the system is focused on a body. (only affects rendering)
+    steps : int
+        number of update steps performed so far.
+    contact_plan : ContactPlan | None
+        if set, link visibility and sunlight are read from the plan while within its horizon, instead of being computed
+        from the geometry.
+    shadow_model : ShadowModel | None
+        if set, the battery charge uses the illuminated fraction of the sun computed by the model (see
+        enable_shadow_model), this takes precedence over the sunlight of the contact plan.
 
     Methods
     -------
@@ -429,6 +521,14 @@ class System:
         Draws all the bodies in the system on the window.
     update()
         Updates the positions and the velocities of all the bodies in the system.
+    run(n_steps)
+        Updates the system n_steps times, recording the satellites state.
+    run_chunks(n_steps)
+        Same as run, but yields the recorded state in chunks.
+    enable_conjunction_screening(threshold)
+        Logs the close approaches of the satellites during the updates.
+    enable_shadow_model()
+        Computes the satellites illumination with a shared shadow model during the updates.
     """
 
     def __init__(self,
@@ -458,6 +558,17 @@ class System:
         else:
             self.focus_scale = focus_scale
 
+        self.steps = 0
+        self._visibility = {}  # (satellite, target) -> obstructed, for the current step
+        self.conjunction_screener = None
+        self.contact_plan = None
+        self.shadow_model = None
+
+    @property
+    def time(self) -> float:
+        """Simulated time elapsed since the start, in seconds."""
+        return self.steps * self.time_delta
+
     def draw(self, window):
         """Draws all the bodies in the system on the window."""
         for body in self.celestial_bodies:
@@ -469,17 +580,167 @@ class System:
         """Updates the positions and the velocities of all the bodies in the system."""
         for body in self.celestial_bodies:
             body.update(self.celestial_bodies, self.time_delta)
+        self._visibility.clear()
         self._satellite_connection()
-        for satellite in self.satellites:
-            satellite.update(self.celestial_bodies, self.time_delta)
+        if self.shadow_model is None:
+            for satellite in self.satellites:
+                sunlit = None
+                if self.contact_plan is not None:
+                    sunlit = self.contact_plan.is_sunlit(satellite, self.time + self.time_delta)
+                satellite.update(self.celestial_bodies, self.time_delta, sunlit=sunlit)
+        else:
+            # all the satellites move, then they are classified against the shadows at once
+            for satellite in self.satellites:
+                Body.update(satellite, self.celestial_bodies, self.time_delta)
+            self.shadow_model.update()
+            illumination = self.shadow_model.illumination([(sat.x, sat.y) for sat in self.satellites])
+            for satellite, sunlit in zip(self.satellites, illumination.tolist()):
+                satellite._subsystems_update(self.celestial_bodies, self.time_delta, sunlit=sunlit)
+        self.steps += 1
+        if self.conjunction_screener is not None:
+            self.conjunction_screener.step(self.time, self.time_delta)
+
+    def enable_conjunction_screening(self, threshold: float, small_bodies: list[Body] = ()):
+        """
+        Screens, at every update, the close approaches between satellites and between satellites and small bodies.
+
+        Parameters
+        ----------
+        threshold : float
+            distance below which a close approach is logged, in m.
+        small_bodies : list[Body], optional
+            celestial bodies to screen against the satellites (e.g. natural moons).
+        """
+        self.conjunction_screener = ConjunctionScreener(self.satellites + list(small_bodies), threshold)
+
+    def enable_shadow_model(self, occluders: list[Body] | None = None):
+        """
+        Computes, at every update, the illuminated fraction of the sun of all the satellites with one shadow model
+        (umbra and penumbra of each occluder), instead of checking the path to the sun of each satellite.
+
+        Parameters
+        ----------
+        occluders : list[Body], optional
+            bodies casting shadows (default are all the celestial bodies but the sun).
+        """
+        occluders = self.celestial_bodies if occluders is None else occluders
+        self.shadow_model = ShadowModel(self.sun, occluders)
+
+    @property
+    def conjunctions(self) -> list[ConjunctionEvent]:
+        """Close approaches logged so far, including the ones still in progress."""
+        if self.conjunction_screener is None:
+            return []
+        return self.conjunction_screener.events + self.conjunction_screener.in_progress
+
+    def run_chunks(self,
+                   n_steps: int,
+                   fields=("altitude", "battery", "connections", "attempted_connections", "boosting"),
+                   every=1,
+                   chunk_size=1024,
+                   until=None,
+                   dtype=np.float64,
+                   ):
+        """
+        Updates the system n_steps times without drawing, recording the satellites state in preallocated arrays.
+
+        Parameters
+        ----------
+        n_steps : int
+            maximum number of steps.
+        fields : tuple[str, ...], optional
+            satellite attributes to record, see SAT_FIELDS (default are the SatInfo ones).
+        every : int, optional
+            the state is recorded once every `every` steps (default is 1).
+        chunk_size : int, optional
+            number of records in each chunk (default is 1024).
+        until : callable, optional
+            stop condition, called with the system after each step.
+        dtype : np.dtype, optional
+            type of the recorded arrays (default is np.float64).
+
+        Yields
+        ------
+        dict[str, np.ndarray]
+            "step" array with shape (records,) and an array with shape (records, satellites) for each field. The last
+            chunk may be shorter.
+        """
+        satellites = self.satellites
+        n_satellites = len(satellites)
+        getter = attrgetter(*fields)
+
+        def new_chunk():
+            chunk = {field: np.empty((chunk_size, n_satellites), dtype=dtype) for field in fields}
+            chunk["step"] = np.empty(chunk_size, dtype=np.int64)
+            return chunk
+
+        chunk = new_chunk()
+        filled = 0
+        update = self.update
+        for step in range(1, n_steps + 1):
+            update()
+            if step % every == 0:
+                values = np.array([getter(sat) for sat in satellites], dtype=dtype).reshape(n_satellites, -1)
+                for i, field in enumerate(fields):
+                    chunk[field][filled] = values[:, i]
+                chunk["step"][filled] = self.steps
+                filled += 1
+                if filled == chunk_size:
+                    yield chunk
+                    chunk = new_chunk()
+                    filled = 0
+            if until is not None and until(self):
+                break
+
+        if filled:
+            yield {key: array[:filled] for key, array in chunk.items()}
+
+    def run(self,
+            n_steps: int,
+            fields=("altitude", "battery", "connections", "attempted_connections", "boosting"),
+            every=1,
+            until=None,
+            dtype=np.float64,
+            ) -> dict[str, np.ndarray]:
+        """
+        Updates the system n_steps times without drawing, recording the satellites state.
+
+        See run_chunks for the parameters.
+
+        Returns
+        -------
+        dict[str, np.ndarray]
+            "step" array with shape (records,) and an array with shape (records, satellites) for each field.
+        """
+        n_records = max(n_steps // every, 1)
+        for chunk in self.run_chunks(n_steps, fields, every, n_records, until, dtype):
+            return chunk
+        empty = {field: np.empty((0, len(self.satellites)), dtype=dtype) for field in fields}
+        empty["step"] = np.empty(0, dtype=np.int64)
+        return empty
 
     def draw_focused(self, window, focus: Body):
         """Draws all the bodies in the system on the window, centerd around the focus"""
         for body in self.celestial_bodies:
             body.draw_focused(window, focus, self.focus_scale)
         for sat in self.satellites:
+            target = sat.relay if sat.relay is not None else sat.motherbase
             sat.draw_focused(window, focus, self.focus_scale)
-            sat.draw_connection_focused(window, sat.relay, self.celestial_bodies, focus, self.focus_scale)
+            sat.draw_connection_focused(window, target, self.celestial_bodies, focus, self.focus_scale,
+                                        obstructed=self.path_obstructed(sat, target))
+
+    def path_obstructed(self, sat: Satellite, target: Body) -> bool:
+        """Checks if the path between the satellite and the target is obstructed, computed once per step."""
+        key = (sat, target)
+        if key not in self._visibility:
+            visible = None
+            if self.contact_plan is not None:
+                visible = self.contact_plan.is_visible(sat, target, self.time)
+            if visible is None:
+                self._visibility[key] = sat.calculate_path(target, self.celestial_bodies)
+            else:
+                self._visibility[key] = not visible
+        return self._visibility[key]
 
     def _satellite_connection(self):
         """Check if the satellites can connect to motherbase directly or through a relay."""
@@ -487,7 +748,7 @@ class System:
         for sat in self.satellites:
             sat.connections = 0
             sat.attempted_connections = 1
-            obstructed = sat.calculate_path(sat.motherbase, self.celestial_bodies)
+            obstructed = self.path_obstructed(sat, sat.motherbase)
             if not obstructed:
                 sat.connections += 1
                 sat.relay = sat.motherbase
@@ -502,7 +763,7 @@ class System:
 
             for relay in connected_sats:
                 sat.attempted_connections += 1
-                obstructed = sat.calculate_path(relay, self.celestial_bodies)
+                obstructed = self.path_obstructed(sat, relay)
                 if not obstructed and relay.battery > relay.safe_battery_level:
                     sat.connections += 1
                     sat.relay = relay
@@ -1,3 +1,4 @@
+import os
 import math
 import random
 import pygame
@@ -12,6 +13,7 @@ WINDOW = pygame.display.set_mode((WIDTH, HEIGHT))
 CLOCK = pygame.time.Clock()
 FONT = pygame.font.SysFont("comicsans", 25)
 pygame.display.set_caption("Orbit Simulation")
+HEADLESS = os.environ.get("SDL_VIDEODRIVER") == "dummy"  # nothing is shown, e.g. optimisation or parallel workers
 
 # colors
 Color = namedtuple("Color", ["r", "g", "b"])
@@ -50,16 +52,17 @@ def get_start_cond(theta, distance, velocity):
     return x, y, vx, vy
 
 
-def main_step(system, tick=0) -> bool:
+def main_step(system, tick=0, draw=True) -> bool:
     run = True
     CLOCK.tick(tick)
-    WINDOW.fill(BLACK)
     for event in pygame.event.get():
         if event.type == pygame.QUIT:  # if user manually quits
             run = False
 
     # main simulation loop
     system.update()
-    system.draw(WINDOW)
+    if draw:
+        WINDOW.fill(BLACK)
+        system.draw(WINDOW)
 
     return run
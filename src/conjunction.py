@@ -0,0 +1,149 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+
+
+@dataclass
+class ConjunctionEvent:
+    """Close approach between two objects: time of closest approach in s, the two objects and the miss distance in m."""
+    time: float
+    first: object
+    second: object
+    miss_distance: float
+
+
+def sweep_and_prune(low: np.ndarray, high: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs of overlapping axis aligned boxes.
+
+    Boxes are sorted along the axis with the largest spread; for each box, the boxes starting before its end are found
+    with a binary search and the pairs are then filtered on the other axis.
+
+    Parameters
+    ----------
+    low, high : np.ndarray
+        lower and upper corners of the boxes, shape (n, 2).
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        indices i < j of the overlapping boxes.
+    """
+    n = len(low)
+    axis = int(np.argmax(np.ptp(low, axis=0))) if n else 0
+    other = 1 - axis
+
+    order = np.argsort(low[:, axis], kind="stable")
+    low_sorted = low[order, axis]
+    end = np.searchsorted(low_sorted, high[order, axis], side="right")
+
+    # for each sorted box a, its candidates are the sorted boxes a + 1 ... end[a] - 1
+    counts = np.maximum(end - np.arange(n) - 1, 0)
+    a = np.repeat(np.arange(n), counts)
+    b = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + a + 1
+    i, j = order[a], order[b]
+
+    overlap = (low[i, other] <= high[j, other]) & (low[j, other] <= high[i, other])
+    i, j = i[overlap], j[overlap]
+    return np.minimum(i, j), np.maximum(i, j)
+
+
+class ConjunctionScreener:
+    """
+    Detects when two objects pass within a threshold distance of each other.
+
+    At every step the objects are assumed to move in a straight line from their previous position. The segments,
+    inflated by the threshold, are paired with a sweep and prune; candidate pairs are then refined computing the
+    minimum distance between the two moving points (swept spheres), so that fast passes between two steps are not
+    missed. Pairs of objects that are not satellites (e.g. Phobos and Deimos) are ignored.
+
+    A close approach lasting several steps is logged once, at its closest point, when it ends.
+
+    Attributes
+    ----------
+    objects : list[Body]
+        screened objects.
+    threshold : float
+        distance below which a conjunction is logged, in m.
+    events : list[ConjunctionEvent]
+        finished conjunctions, in order of end.
+
+    Methods
+    -------
+    step(time, time_delta)
+        Screens the last step.
+    in_progress
+        Conjunctions not ended yet.
+    flush()
+        Logs the conjunctions still in progress.
+    """
+
+    def __init__(self, objects: list, threshold: float):
+        """Constructor Method."""
+        self.objects = list(objects)
+        self.threshold = threshold
+        self.events = []
+
+        self._is_satellite = np.array([hasattr(obj, "orbit_target") for obj in self.objects], dtype=bool)
+        self._previous = self._positions()
+        self._active = {}  # (i, j) -> (time, miss distance) of the closest approach so far
+
+    def _positions(self) -> np.ndarray:
+        return np.array([(obj.x, obj.y) for obj in self.objects], dtype=float).reshape(-1, 2)
+
+    def step(self, time: float, time_delta: float):
+        """
+        Screens the motion of the objects since the previous call.
+
+        Parameters
+        ----------
+        time : float
+            current simulated time in s.
+        time_delta : float
+            time elapsed since the previous call in s.
+        """
+        p0 = self._previous
+        p1 = self._positions()
+        self._previous = p1
+
+        # broad phase: boxes around each segment
+        radius = self.threshold / 2
+        i, j = sweep_and_prune(np.minimum(p0, p1) - radius, np.maximum(p0, p1) + radius)
+        keep = self._is_satellite[i] | self._is_satellite[j]
+        i, j = i[keep], j[keep]
+
+        # narrow phase: closest approach of the relative motion within the step
+        d0 = p0[j] - p0[i]
+        v = (p1[j] - p1[i]) - d0
+        vv = np.sum(v ** 2, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = np.where(vv > 0, np.clip(-np.sum(d0 * v, axis=1) / vv, 0, 1), 0)
+        miss = np.hypot(*(d0 + s[:, None] * v).T)
+        close = miss < self.threshold
+        tca = time - (1 - s[close]) * time_delta
+
+        current = {}
+        for pair, t, distance in zip(zip(i[close].tolist(), j[close].tolist()), tca.tolist(), miss[close].tolist()):
+            best = self._active.get(pair)
+            current[pair] = (t, distance) if best is None or distance < best[1] else best
+
+        for pair in self._active.keys() - current.keys():
+            self._log(pair, *self._active[pair])
+        self._active = current
+
+    @property
+    def in_progress(self) -> list[ConjunctionEvent]:
+        """Conjunctions not ended yet, at their closest approach so far."""
+        return [self._event(pair, t, distance) for pair, (t, distance) in self._active.items()]
+
+    def flush(self):
+        """Logs the conjunctions still in progress (e.g. at the end of the simulation)."""
+        for pair, (t, distance) in self._active.items():
+            self._log(pair, t, distance)
+        self._active = {}
+
+    def _event(self, pair: tuple[int, int], time: float, distance: float) -> ConjunctionEvent:
+        return ConjunctionEvent(time, self.objects[pair[0]], self.objects[pair[1]], distance)
+
+    def _log(self, pair: tuple[int, int], time: float, distance: float):
+        self.events.append(self._event(pair, time, distance))
@@ -0,0 +1,256 @@
+from __future__ import annotations
+import copy
+import numpy as np
+
+
+def obstructed_paths(start: np.ndarray,
+                     end: np.ndarray,
+                     obstacles: np.ndarray,
+                     radii: np.ndarray,
+                     excluded: np.ndarray,
+                     ) -> np.ndarray:
+    """
+    Vectorized version of Satellite.calculate_path, for many paths at once.
+
+    Parameters
+    ----------
+    start, end : np.ndarray
+        end points of the paths, shape (paths, 2).
+    obstacles : np.ndarray
+        positions of the obstacles, shape (obstacles, 2).
+    radii : np.ndarray
+        effective radius (radius times interference factor) of each obstacle for each path, shape (paths, obstacles).
+    excluded : np.ndarray
+        True where the obstacle is an end point of the path and must be skipped, shape (paths, obstacles).
+
+    Returns
+    -------
+    np.ndarray
+        True for the obstructed paths, shape (paths,).
+    """
+    # line equation ax + by + c = 0
+    a = (end[:, 1] - start[:, 1])[:, None]
+    b = (start[:, 0] - end[:, 0])[:, None]
+    c = (end[:, 0] * start[:, 1] - start[:, 0] * end[:, 1])[:, None]
+    ox = obstacles[None, :, 0]
+    oy = obstacles[None, :, 1]
+
+    # the obstacle is in between the end points
+    low = np.minimum(start, end)[:, None, :]
+    high = np.maximum(start, end)[:, None, :]
+    between = (low[..., 0] - radii < ox) & (ox < high[..., 0] + radii) \
+        & (low[..., 1] - radii < oy) & (oy < high[..., 1] + radii)
+
+    # distance between the obstacle and the line
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distance = np.abs(a * ox + b * oy + c) / np.sqrt(a ** 2 + b ** 2)
+    return np.any(between & (distance < radii) & ~excluded, axis=1)
+
+
+class ContactPlan:
+    """
+    Schedule of the link and sunlight windows of the satellites of a system over a future horizon.
+
+    The plan is generated propagating a copy of the system. For each link (satellite-motherbase, satellite-satellite
+    and satellite-sun for sunlight) the steps in which the path is not obstructed are stored as sorted, disjoint
+    [start, end) intervals, so that queries are binary searches. Times are in seconds from the start of the
+    simulation. Link visibility at a time is the one the system uses for routing in the update starting at that time,
+    so a system reading from the plan (see System.contact_plan) behaves exactly as one computing the geometry.
+
+    Attributes
+    ----------
+    time_delta : float
+        time delta of the propagation in s.
+    first_step, last_step : int
+        system steps covered by the plan.
+
+    Methods
+    -------
+    generate(system, horizon)
+        Builds the plan propagating the system.
+    is_visible(a, b, time)
+        Whether the link is free at the time.
+    is_sunlit(sat, time)
+        Whether the satellite is in the sun at the time.
+    windows(a, b)
+        Visibility windows of the link.
+    next_contact(sat, time)
+        First window of the satellite not ended before the time.
+    active_links(time)
+        All the links visible at the time.
+    """
+
+    def __init__(self, time_delta: float, first_step: int, last_step: int):
+        """Constructor Method, see generate."""
+        self.time_delta = time_delta
+        self.first_step = first_step
+        self.last_step = last_step
+        self._intervals = {}  # (body, body) -> (starts, ends) in steps
+        self._links = {}  # satellite -> [(other end, starts, ends)] of its communication links
+        self._link_keys = []  # communication links
+        self._windows = (np.empty(0, dtype=int),) * 3  # (link, start, end) of all their windows
+        self._sun = None
+
+    @classmethod
+    def generate(cls, system, horizon: int, satellite_links=True) -> ContactPlan:
+        """
+        Builds the plan propagating a copy of the system, the system itself is not modified.
+
+        Parameters
+        ----------
+        system : System
+            the system, the plan starts at its current step.
+        horizon : int
+            number of steps to propagate.
+        satellite_links : bool, optional
+            whether to include the satellite-satellite links (default is True).
+
+        Returns
+        -------
+        ContactPlan
+            the plan, its links are keyed by the bodies of the original system.
+        """
+        plan = cls(system.time_delta, system.steps, system.steps + horizon)
+        plan._sun = system.sun
+
+        future = copy.deepcopy(system)
+        future.contact_plan = None
+        future.conjunction_screener = None
+        originals = dict(zip(map(id, future.celestial_bodies + future.satellites),
+                             system.celestial_bodies + system.satellites))
+        sats = future.satellites
+        bodies = future.celestial_bodies
+        body_index = {id(body): i for i, body in enumerate(bodies)}
+        sat_index = {id(sat): i for i, sat in enumerate(sats)}
+
+        # positions at each step, one step past the horizon
+        sat_pos = np.empty((horizon + 2, len(sats), 2))
+        body_pos = np.empty((horizon + 2, len(bodies), 2))
+        for k in range(horizon + 2):
+            if k:
+                future.update()
+            sat_pos[k] = np.array([(sat.x, sat.y) for sat in sats], dtype=float).reshape(-1, 2)
+            body_pos[k] = np.array([(body.x, body.y) for body in bodies], dtype=float).reshape(-1, 2)
+
+        # links: (source satellite index, target), targets are bodies of the copy
+        links = [(i, sat.motherbase) for i, sat in enumerate(sats)] + [(i, sat.sun) for i, sat in enumerate(sats)]
+        if satellite_links:
+            links += [(i, sats[j]) for i in range(len(sats)) for j in range(i + 1, len(sats))]
+        source = np.array([i for i, _ in links], dtype=int)
+        target_body = np.array([body_index.get(id(target), -1) for _, target in links], dtype=int)
+        target_sat = np.array([sat_index.get(id(target), -1) for _, target in links], dtype=int)
+        sunlight = np.array([target is sats[i].sun for i, target in links], dtype=bool)
+        factor = np.array([sats[i].interference_factor for i, _ in links], dtype=float)
+        radii = factor[:, None] * np.array([body.radius for body in bodies], dtype=float)[None, :]
+        excluded = target_body[:, None] == np.arange(len(bodies))[None, :]
+
+        # System.update checks the links after moving the celestial bodies but before moving the satellites, and the
+        # sunlight after moving everything: at step k links use the bodies of step k + 1, sunlight those of step k
+        visible = np.empty((horizon + 1, len(links)), dtype=bool)
+        is_body = (target_body >= 0)[:, None]
+        for k in range(horizon + 1):
+            for bodies_k, group in ((k, sunlight), (k + 1, ~sunlight)):
+                start = sat_pos[k][source[group]]
+                end = np.where(is_body[group], body_pos[bodies_k][np.maximum(target_body[group], 0)],
+                               sat_pos[k][np.maximum(target_sat[group], 0)])
+                visible[k, group] = ~obstructed_paths(start, end, body_pos[bodies_k], radii[group], excluded[group])
+
+        # visible steps -> [start, end) intervals
+        padded = np.zeros((horizon + 3, len(links)), dtype=np.int8)
+        padded[1:-1] = visible
+        edges = np.diff(padded, axis=0)
+        windows = []
+        for col, (i, target) in enumerate(links):
+            key = (originals[id(sats[i])], originals[id(target)])
+            starts = np.flatnonzero(edges[:, col] == 1) + plan.first_step
+            ends = np.flatnonzero(edges[:, col] == -1) + plan.first_step
+            plan._intervals[key] = (starts, ends)
+            if key[1] is not plan._sun:
+                plan._links.setdefault(key[0], []).append((key[1], starts, ends))
+                plan._links.setdefault(key[1], []).append((key[0], starts, ends))
+                windows.append((np.full(len(starts), len(plan._link_keys)), starts, ends))
+                plan._link_keys.append(key)
+        if windows:
+            plan._windows = tuple(np.concatenate(column) for column in zip(*windows))
+        return plan
+
+    def _step(self, time: float) -> int:
+        return round(time / self.time_delta)
+
+    def _key(self, a, b):
+        if (a, b) in self._intervals:
+            return a, b
+        if (b, a) in self._intervals:
+            return b, a
+        return None
+
+    def covers(self, time: float) -> bool:
+        """Whether the time is within the horizon of the plan."""
+        return self.first_step <= self._step(time) <= self.last_step
+
+    def is_visible(self, a, b, time: float) -> bool | None:
+        """Whether the path between the two bodies is free at the time, None if the plan does not know."""
+        key = self._key(a, b)
+        step = self._step(time)
+        if key is None or not self.first_step <= step <= self.last_step:
+            return None
+        starts, ends = self._intervals[key]
+        i = np.searchsorted(starts, step, side="right") - 1
+        return bool(i >= 0 and step < ends[i])
+
+    def is_sunlit(self, sat, time: float) -> bool | None:
+        """Whether the satellite is in the sun at the time, None if the plan does not know."""
+        return self.is_visible(sat, self._sun, time)
+
+    def windows(self, a, b) -> np.ndarray:
+        """Visibility windows of the link as (start, end) times, shape (windows, 2)."""
+        key = self._key(a, b)
+        if key is None:
+            return np.empty((0, 2))
+        starts, ends = self._intervals[key]
+        return np.column_stack([starts, ends]) * self.time_delta
+
+    def sunlight_windows(self, sat) -> np.ndarray:
+        """Sunlight windows of the satellite as (start, end) times, shape (windows, 2)."""
+        return self.windows(sat, self._sun)
+
+    def next_contact(self, sat, time: float, targets: list | None = None) -> tuple | None:
+        """
+        First contact of the satellite that has not ended before the time.
+
+        Parameters
+        ----------
+        sat : Satellite
+            the satellite.
+        time : float
+            the time of the query in s.
+        targets : list[Body], optional
+            bodies to consider, default is the motherbase and all the other satellites.
+
+        Returns
+        -------
+        tuple[Body, float, float] | None
+            the other end of the link, start and end time of the contact (start is the query time if the link is
+            already visible), None if there are no more contacts within the horizon.
+        """
+        step = self._step(time)
+        best = None
+        for other, starts, ends in self._links.get(sat, ()):
+            if targets is not None and other not in targets:
+                continue
+            i = np.searchsorted(ends, step, side="right")
+            if i < len(ends):
+                start = max(int(starts[i]), step)
+                if best is None or start < best[1]:
+                    best = (other, start, int(ends[i]))
+        if best is None:
+            return None
+        return best[0], best[1] * self.time_delta, best[2] * self.time_delta
+
+    def active_links(self, time: float) -> list[tuple]:
+        """Communication links (sunlight excluded) visible at the time."""
+        step = self._step(time)
+        if not self.first_step <= step <= self.last_step:
+            return []
+        link, starts, ends = self._windows
+        return [self._link_keys[i] for i in link[(starts <= step) & (step < ends)].tolist()]
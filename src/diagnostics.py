@@ -0,0 +1,281 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+import matplotlib.pyplot as plt
+from src.config import G
+
+
+def _state(bodies: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Masses (n,), positions (n, 2) and velocities (n, 2) of the bodies."""
+    mass = np.array([body.mass for body in bodies], dtype=float)
+    pos = np.array([(body.x, body.y) for body in bodies], dtype=float).reshape(-1, 2)
+    vel = np.array([(body.vel_x, body.vel_y) for body in bodies], dtype=float).reshape(-1, 2)
+    return mass, pos, vel
+
+
+def total_energy(bodies: list) -> float:
+    """Total mechanical energy (kinetic + gravitational potential) of the bodies in J."""
+    mass, pos, vel = _state(bodies)
+    kinetic = 0.5 * np.sum(mass * np.sum(vel ** 2, axis=1))
+
+    i, j = np.triu_indices(len(bodies), k=1)
+    distance = np.hypot(*(pos[i] - pos[j]).T)
+    potential = -G * np.sum(mass[i] * mass[j] / distance)
+    return float(kinetic + potential)
+
+
+def angular_momentum(bodies: list) -> float:
+    """Total angular momentum of the bodies around the origin in kg m^2/s (z component, the only non-zero one)."""
+    mass, pos, vel = _state(bodies)
+    return float(np.sum(mass * (pos[:, 0] * vel[:, 1] - pos[:, 1] * vel[:, 0])))
+
+
+def linear_momentum(bodies: list) -> np.ndarray:
+    """Total linear momentum of the bodies in kg m/s."""
+    mass, _, vel = _state(bodies)
+    return mass @ vel
+
+
+@dataclass
+class OrbitalElements:
+    """Osculating elements of the satellites orbits, relative to their orbit target. Lengths in m, times in s."""
+    semi_major_axis: np.ndarray
+    eccentricity: np.ndarray
+    argument_of_periapsis: np.ndarray  # rad
+    periapsis: np.ndarray  # altitude
+    apoapsis: np.ndarray  # altitude, inf for escape orbits
+    period: np.ndarray  # nan for escape orbits
+
+
+def orbital_elements(satellites: list) -> OrbitalElements:
+    """
+    Computes the osculating orbital elements of the satellites, each one relative to its orbit target.
+
+    Parameters
+    ----------
+    satellites : list[Satellite]
+        satellites, they must have an orbit target.
+
+    Returns
+    -------
+    OrbitalElements
+        elements of the orbits, one entry for each satellite.
+    """
+    mass, pos, vel = _state(satellites)
+    target_mass, target_pos, target_vel = _state([sat.orbit_target for sat in satellites])
+    target_radius = np.array([sat.orbit_target.radius for sat in satellites], dtype=float)
+
+    mu = G * (mass + target_mass)
+    r = pos - target_pos
+    v = vel - target_vel
+    r_norm = np.hypot(r[:, 0], r[:, 1])
+    v2 = np.sum(v ** 2, axis=1)
+
+    # vis-viva and eccentricity vector
+    energy = v2 / 2 - mu / r_norm
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = -mu / (2 * energy)
+        e_vec = ((v2 - mu / r_norm)[:, None] * r - np.sum(r * v, axis=1)[:, None] * v) / mu[:, None]
+        e = np.hypot(e_vec[:, 0], e_vec[:, 1])
+        bound = e < 1
+        apoapsis = np.where(bound, a * (1 + e) - target_radius, np.inf)
+        period = np.where(bound, 2 * np.pi * np.sqrt(np.abs(a) ** 3 / mu), np.nan)
+    # from the angular momentum, so that it is also valid for escape orbits
+    h = r[:, 0] * v[:, 1] - r[:, 1] * v[:, 0]
+    periapsis = h ** 2 / (mu * (1 + e)) - target_radius
+
+    return OrbitalElements(a, e, np.arctan2(e_vec[:, 1], e_vec[:, 0]), periapsis, apoapsis, period)
+
+
+def stable_time_delta(system, eta: float = 0.05) -> float:
+    """
+    Largest time delta that resolves the fastest orbit of the system.
+
+    For each pair of celestial bodies, and for each satellite and its orbit target, the dynamical time
+    sqrt(r^3 / (G (m1 + m2))) is the orbital period divided by 2 pi for circular orbits. The step is `eta` times the
+    smallest of them.
+
+    Parameters
+    ----------
+    system : System
+        the system to analyse.
+    eta : float, optional
+        fraction of the dynamical time covered by a single step (default is 0.05, about 125 steps per orbit).
+
+    Returns
+    -------
+    float
+        the time delta in s.
+    """
+    mass, pos, _ = _state(system.celestial_bodies)
+    i, j = np.triu_indices(len(mass), k=1)
+    r = np.hypot(*(pos[i] - pos[j]).T)
+    dynamical_times = np.sqrt(r ** 3 / (G * (mass[i] + mass[j])))
+
+    satellites = [sat for sat in system.satellites if sat.orbit_target is not None]
+    if satellites:
+        sat_mass, sat_pos, _ = _state(satellites)
+        target_mass, target_pos, _ = _state([sat.orbit_target for sat in satellites])
+        r = np.hypot(*(sat_pos - target_pos).T)
+        dynamical_times = np.concatenate([dynamical_times, np.sqrt(r ** 3 / (G * (sat_mass + target_mass)))])
+
+    return float(eta * np.min(dynamical_times))
+
+
+class Diagnostics:
+    """
+    Monitors the conservation laws and the satellites orbits of a system during a simulation.
+
+    Every `every` steps it records the total energy, angular momentum and linear momentum of the celestial bodies and
+    the orbital elements of the satellites. Drifts are relative to the state at construction.
+
+    Attributes
+    ----------
+    system : System
+        the monitored system.
+    every : int
+        number of steps between two records.
+    steps : list[int]
+        steps at which the records were taken.
+
+    Methods
+    -------
+    update()
+        Records the state of the system, if it is the time to.
+    drift()
+        Relative drift of the conserved quantities.
+    recommend_time_delta(tolerance)
+        Largest time delta that keeps the drift within tolerance.
+    plot(path)
+        Drift dashboard.
+    """
+
+    def __init__(self, system, every: int = 100):
+        """Constructor Method."""
+        self.system = system
+        self.every = every
+
+        self.steps = []
+        self._energy = []
+        self._angular_momentum = []
+        self._momentum = []
+        self._elements = []
+        self._record()
+
+        # scales to normalize the drifts: sums of the magnitudes of the terms, as the totals can be close to zero
+        mass, pos, vel = _state(system.celestial_bodies)
+        i, j = np.triu_indices(len(mass), k=1)
+        self._energy_scale = float(0.5 * np.sum(mass * np.sum(vel ** 2, axis=1))
+                                   + G * np.sum(mass[i] * mass[j] / np.hypot(*(pos[i] - pos[j]).T)))
+        self._angular_momentum_scale = float(np.sum(mass * np.abs(pos[:, 0] * vel[:, 1] - pos[:, 1] * vel[:, 0])))
+        self._momentum_scale = float(np.sum(mass * np.hypot(vel[:, 0], vel[:, 1])))
+        # bodies initially at rest: no meaningful scale, the drift is left absolute
+        self._energy_scale = self._energy_scale or 1.0
+        self._angular_momentum_scale = self._angular_momentum_scale or 1.0
+        self._momentum_scale = self._momentum_scale or 1.0
+
+    def _record(self):
+        self.steps.append(self.system.steps)
+        self._energy.append(total_energy(self.system.celestial_bodies))
+        self._angular_momentum.append(angular_momentum(self.system.celestial_bodies))
+        self._momentum.append(linear_momentum(self.system.celestial_bodies))
+        if self.system.satellites and all(sat.orbit_target is not None for sat in self.system.satellites):
+            self._elements.append(orbital_elements(self.system.satellites))
+
+    def update(self):
+        """Records the state of the system, call it after each system update."""
+        if self.system.steps % self.every == 0 and self.system.steps != self.steps[-1]:
+            self._record()
+
+    def drift(self) -> dict[str, np.ndarray]:
+        """
+        Relative drift of the conserved quantities for each record.
+
+        Returns
+        -------
+        dict[str, np.ndarray]
+            change from the initial value of "energy", "angular_momentum" and "momentum", each relative to the initial
+            sum of the magnitudes of its terms (kinetic and potential energies, angular momenta and momenta of the
+            bodies), so that it is defined even when the total is zero.
+        """
+        energy = np.array(self._energy)
+        ang = np.array(self._angular_momentum)
+        momentum = np.array(self._momentum)
+        return {
+            "energy": np.abs(energy - energy[0]) / self._energy_scale,
+            "angular_momentum": np.abs(ang - ang[0]) / self._angular_momentum_scale,
+            "momentum": np.hypot(*(momentum - momentum[0]).T) / self._momentum_scale,
+        }
+
+    def elements(self, name: str) -> np.ndarray:
+        """History of one of the satellites orbital elements (see OrbitalElements), shape (records, satellites)."""
+        return np.array([getattr(elements, name) for elements in self._elements])
+
+    def recommend_time_delta(self, tolerance: float = 1e-6, eta: float = 0.1) -> float:
+        """
+        Recommends the largest time delta that keeps the energy and angular momentum drift within tolerance.
+
+        The integrator is first order, so the drift is assumed to scale linearly with the time delta. The result is
+        capped with `stable_time_delta`, so that it still resolves the fastest orbit.
+
+        Parameters
+        ----------
+        tolerance : float, optional
+            maximum accepted relative drift over the monitored run (default is 1e-6).
+        eta : float, optional
+            see stable_time_delta (default is 0.1).
+
+        Returns
+        -------
+        float
+            the time delta in s.
+        """
+        stability_limit = stable_time_delta(self.system, eta)
+        if len(self.steps) < 2:
+            return min(self.system.time_delta, stability_limit)
+
+        drift = self.drift()
+        worst = max(drift["energy"].max(), drift["angular_momentum"].max())
+        if worst == 0:
+            return stability_limit
+        return float(min(self.system.time_delta * tolerance / worst, stability_limit))
+
+    def plot(self, path: str | None = None):
+        """
+        Drift dashboard: conserved quantities drift and satellites apsides over time.
+
+        Parameters
+        ----------
+        path : str, optional
+            if given, the figure is saved there.
+
+        Returns
+        -------
+        matplotlib.figure.Figure
+            the dashboard figure.
+        """
+        time = np.array(self.steps) * self.system.time_delta
+        drift = self.drift()
+        n_rows = 4 if self._elements else 3
+        fig, axs = plt.subplots(n_rows, 1, figsize=(16, 2.5 * n_rows), sharex=True)
+
+        for ax, key, label in zip(axs, ("energy", "angular_momentum", "momentum"),
+                                  ("Energy drift", "Angular momentum\ndrift", "Momentum drift")):
+            ax.semilogy(time, np.maximum(drift[key], np.finfo(float).tiny))
+            ax.set_ylabel(label)
+
+        if self._elements:
+            periapsis = self.elements("periapsis")
+            apoapsis = self.elements("apoapsis")
+            for i, sat in enumerate(self.system.satellites):
+                line, = axs[3].plot(time, periapsis[:, i], label=sat.name, linewidth=0.5)
+                axs[3].plot(time, apoapsis[:, i], color=line.get_color(), linestyle="--", linewidth=0.5)
+            axs[3].set_ylabel("Periapsis / Apoapsis\naltitude (m)")
+            axs[3].legend()
+
+        axs[-1].set_xlabel("Time (s)")
+        fig.suptitle(f"time delta = {self.system.time_delta}s, "
+                     f"recommended = {round(self.recommend_time_delta(), 1)}s")
+        if path is not None:
+            fig.savefig(path)
+        return fig
@@ -34,7 +34,18 @@ formula AsymptoticStabilityHigh = eventually ( globally ((altitude > 4600000) &
 formula Connection = ! globally[0, 30] (connections < 1);
 """
 
+# same specifications, with quantitative semantics: the monitors return the robustness instead of the satisfaction
+_robustness_script = """
+signal { int connections; real altitude; real battery; }
+domain minmax;
+formula SafeBatteryUsage = eventually[0, 5] (battery > 20);
+formula SafeAltitudeLow = eventually[0,5] ((altitude > 200000) & (altitude < 1200000));
+formula SafeAltitudeHigh = eventually[0,5] ((altitude > 4600000) & (altitude < 5800000));
+formula Connection = ! globally[0, 30] (connections < 1);
+"""
+
 _moonlightScript = ScriptLoader.loadFromText(_parametrized_script)
+_robustnessScript = ScriptLoader.loadFromText(_robustness_script)
 
 pos_bat_monitor = _moonlightScript.getMonitor("PositiveBattery")
 safe_bat_monitor = _moonlightScript.getMonitor("SafeBatteryUsage")
@@ -43,3 +54,8 @@ safe_highalt_monitor = _moonlightScript.getMonitor("SafeAltitudeHigh")
 lowasym_stab_monitor = _moonlightScript.getMonitor("AsymptoticStabilityLow")
 highasym_stab_monitor = _moonlightScript.getMonitor("AsymptoticStabilityHigh")
 connection_monitor = _moonlightScript.getMonitor("Connection")
+
+safe_bat_robustness = _robustnessScript.getMonitor("SafeBatteryUsage")
+safe_lowalt_robustness = _robustnessScript.getMonitor("SafeAltitudeLow")
+safe_highalt_robustness = _robustnessScript.getMonitor("SafeAltitudeHigh")
+connection_robustness = _robustnessScript.getMonitor("Connection")
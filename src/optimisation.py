@@ -0,0 +1,325 @@
+from __future__ import annotations
+import os
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # simulations are headless
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+from src.config import *
+from src.body import Body, Satellite, System
+from src.monitoring import safe_bat_robustness, connection_robustness
+from src.monitoring import safe_lowalt_robustness, safe_highalt_robustness
+
+
+# tunable controller parameters and their default search bounds
+PARAMETER_SPACE = {
+    "boost_factor": (0.01, 0.5),  # boost force / satellite mass
+    "boost_time": (60, 3600),  # seconds
+    "safe_battery_level": (5, 50),  # percentage
+    "transmission_factor": (0.001, 0.01),
+    "connection_factor": (0.001, 0.01),
+}
+
+# parameters set as Satellite attributes
+_SATELLITE_ATTRIBUTES = {
+    "safe_battery_level": "safe_battery_level",
+    "solar_charge_factor": "_solar_charge_factor",
+    "battery_discharge_factor": "_battery_discharge_factor",
+    "transmission_factor": "_transmission_factor",
+    "connection_factor": "_connection_factor",
+}
+
+
+def mars_scenario(params: dict[str, float], time_delta=60, seed=0) -> System:
+    """
+    Headless version of the `mars_satellite.py` example, with the satellites using the given controller parameters.
+
+    The bodies are the same as in the example; their starting angles, random in the example, are drawn from `seed`,
+    so that all the candidates of a search are scored on the same geometry.
+
+    Parameters
+    ----------
+    params : dict[str, float]
+        controller parameters, see PARAMETER_SPACE. Missing ones keep the Satellite defaults.
+    time_delta : float, optional
+        time delta of the system in s (default is 60).
+    seed : int, optional
+        seed of the starting angles of the planets (default is 0).
+
+    Returns
+    -------
+    System
+        the system, with the three satellites orbiting Mars.
+    """
+    controller = {_SATELLITE_ATTRIBUTES[name]: value for name, value in params.items() if name in _SATELLITE_ATTRIBUTES}
+    boost_time = {"boost_time": params["boost_time"]} if "boost_time" in params else {}
+    rng = random.Random(seed)
+
+    sun = Body(0, 0, radius=696.240e6, color=YELLOW, mass=1.989e30, name="Sun")
+
+    theta = rng.uniform(0, 2 * math.pi)
+    x, y, vx, vy = get_start_cond(theta, 1 * AU, 29.78e3)
+    earth = Body(x, y, radius=6.371e6, color=BLUE, mass=5.972e24, initial_velocity=(vx, vy), name="Earth")
+    x, y, vx, vy = get_start_cond(theta, 1 * AU + earth.radius + 384e6, 29.78e3 + 1.022e3)
+    moon = Body(x, y, radius=1.737e6, color=WHITE, mass=7.347e22, initial_velocity=(vx, vy), name="Moon")
+
+    theta = rng.uniform(0, 2 * math.pi)
+    x, y, vx, vy = get_start_cond(theta, 0.387 * AU, 47.362e3)
+    mercury = Body(x, y, radius=2.439e6, color=DARK_GRAY, mass=3.285e23, initial_velocity=(vx, vy), name="Mercury")
+
+    theta = rng.uniform(0, 2 * math.pi)
+    x, y, vx, vy = get_start_cond(theta, 0.723 * AU, 35.02e3)
+    venus = Body(x, y, radius=6.051e6, color=DARK_RED, mass=4.867e24, initial_velocity=(vx, vy), name="Venus")
+
+    theta = rng.uniform(0, 2 * math.pi)
+    x, y, vx, vy = get_start_cond(theta, 5.203 * AU, 13.07e3)
+    jupiter = Body(x, y, radius=69.911e6, color=LIGHT_BROWN, mass=1.898e27, initial_velocity=(vx, vy), name="Jupiter")
+
+    theta = rng.uniform(0, 2 * math.pi)
+    x, y, vx, vy = get_start_cond(theta, 1.524 * AU, 24.077e3)
+    mars = Body(x, y, radius=3.389e6, color=RED, mass=6.39e23, initial_velocity=(vx, vy), name="Mars")
+    x, y, vx, vy = get_start_cond(theta, 1.524 * AU + mars.radius + 9.4e6, 24.077e3 + 2.138e3)
+    phobos = Body(x, y, radius=11e3, color=PINK, mass=1.0659e16, initial_velocity=(vx, vy), name="Phobos")
+    x, y, vx, vy = get_start_cond(theta, 1.524 * AU + mars.radius + 23e6, 24.077e3 + 1.3513e3)
+    deimos = Body(x, y, radius=6e3, color=DARK_RED, mass=1.4762e15, initial_velocity=(vx, vy), name="Deimos")
+
+    def orbital_speed(d): return math.sqrt(G * mars.mass / (mars.radius + d))
+
+    satellites = []
+    for name, altitude, radius, color, mass, min_altitude, max_altitude in (
+            ("Odyssey", 400e3, 20, LIGHT_GRAY, 725, 200e3, 1200e3),
+            ("Rec Orbiter", 300e3, 20, DARK_GRAY, 1125, 200e3, 1200e3),
+            ("Relay", 5000e3, 10, WHITE, 420, 4500e3, 6000e3)):
+        x, y, vx, vy = get_start_cond(theta, 1.524 * AU + mars.radius + altitude,
+                                      24.077e3 + orbital_speed(altitude))
+        boost_force = mass * params["boost_factor"] if "boost_factor" in params else None
+        sat = Satellite(x, y, name=name, orbit_target=mars, radius=radius, color=color, mass=mass,
+                        initial_velocity=(vx, vy), min_altitude=min_altitude, max_altitude=max_altitude,
+                        boost_force=boost_force, **boost_time)
+        for attribute, value in controller.items():
+            setattr(sat, attribute, value)
+        satellites.append(sat)
+
+    return System([sun, earth, moon, mars, mercury, venus, jupiter, phobos, deimos], satellites, sun=sun,
+                  sat_motherbase=earth, time_delta=time_delta)
+
+
+mars_scenario.version = 2  # increase when the simulated scenario changes, so that cached evaluations are not reused
+
+
+@dataclass
+class Evaluation:
+    """Result of a simulation: robustness of each specification (worst satellite) and overall score."""
+    params: dict[str, float]
+    safe_altitude: float
+    safe_battery: float
+    connection: float
+
+    @property
+    def score(self) -> float:
+        """Sum of the normalized robustness of the specifications, the higher the better."""
+        return self.safe_altitude + self.safe_battery + self.connection
+
+
+# increase when evaluate changes, so that cached evaluations are not reused
+_EVALUATION_VERSION = 2
+
+
+def _min_robustness(monitor, time: list, signals: list) -> float:
+    return min(value for _, value in monitor.monitor(time, signals))
+
+
+def evaluate(params: dict[str, float], n_steps=5000, time_delta=60, scenario=mars_scenario,
+             scenario_seed=0) -> Evaluation:
+    """
+    Runs a headless simulation and scores it with the robustness of the monitoring specifications.
+
+    For each satellite the minimum over time of the SafeAltitude (low or high band, depending on the satellite
+    altitude range), SafeBatteryUsage and Connection robustness is computed; the worst satellite is kept. Altitude
+    robustness is divided by half the width of the band, battery robustness by 100 and connection robustness (about
+    the number of connections minus one) by the number of satellites, so that the three are comparable.
+
+    Parameters
+    ----------
+    params : dict[str, float]
+        controller parameters, see PARAMETER_SPACE.
+    n_steps : int, optional
+        number of simulation steps (default is 5000).
+    time_delta : float, optional
+        time delta of the simulation in s (default is 60).
+    scenario : callable, optional
+        builds the system from the parameters, the time delta and the seed (default is mars_scenario).
+    scenario_seed : int, optional
+        seed passed to the scenario (default is 0).
+
+    Returns
+    -------
+    Evaluation
+        the robustness of the specifications.
+    """
+    system = scenario(params, time_delta=time_delta, seed=scenario_seed)
+    record = system.run(n_steps, fields=("altitude", "battery", "connections"))
+    altitude, battery = record["altitude"], record["battery"]
+    connections = record["connections"].astype(int)
+
+    time = list(range(n_steps))
+    safe_altitude = safe_battery = connection = math.inf
+    for i, sat in enumerate(system.satellites):
+        signals = list(zip(connections[:, i].tolist(), altitude[:, i].tolist(), battery[:, i].tolist()))
+        if sat.max_altitude <= 1200e3:
+            alt_monitor, half_band = safe_lowalt_robustness, 500e3
+        else:
+            alt_monitor, half_band = safe_highalt_robustness, 600e3
+        safe_altitude = min(safe_altitude, _min_robustness(alt_monitor, time, signals) / half_band)
+        safe_battery = min(safe_battery, _min_robustness(safe_bat_robustness, time, signals) / 100)
+        connection = min(connection, _min_robustness(connection_robustness, time, signals) / len(system.satellites))
+
+    return Evaluation(dict(params), safe_altitude, safe_battery, connection)
+
+
+class ControllerOptimiser:
+    """
+    Searches the controller parameters that maximize the robustness of the specifications.
+
+    Candidates are evaluated with short headless simulations (see evaluate) run in parallel worker processes. The
+    search is a cross-entropy method: each batch is sampled from a normal distribution over the (normalized) parameter
+    space, which is then refitted on the best evaluations so far. It stops after `budget` candidates.
+    Finished evaluations are stored in a JSON cache file, so repeated sweeps only simulate new candidates.
+
+    Attributes
+    ----------
+    space : dict[str, tuple[float, float]]
+        parameters to tune and their bounds.
+    history : list[Evaluation]
+        evaluations done so far, in order.
+
+    Methods
+    -------
+    evaluate_many(candidates)
+        Evaluates the candidates, in parallel and using the cache.
+    run()
+        Runs the search, returns the best evaluation.
+    """
+
+    def __init__(self,
+                 space: dict[str, tuple[float, float]] | None = None,
+                 budget=64,
+                 batch_size=8,
+                 elite_fraction=0.25,
+                 n_steps=5000,
+                 time_delta=60,
+                 scenario=mars_scenario,
+                 scenario_seed=0,
+                 workers: int | None = None,
+                 cache_path: str | None = "optimisation_cache.json",
+                 seed=0,
+                 ):
+        """
+        Constructor Method.
+
+        Parameters
+        ----------
+        space : dict[str, tuple[float, float]], optional
+            parameters to tune and their bounds (default is PARAMETER_SPACE).
+        budget : int, optional
+            total number of candidates to evaluate (default is 64).
+        batch_size : int, optional
+            number of candidates sampled at each iteration (default is 8).
+        elite_fraction : float, optional
+            fraction of the best evaluations used to refit the sampling distribution (default is 0.25).
+        n_steps, time_delta : int, float, optional
+            length and time delta of each simulation, see evaluate.
+        scenario : callable, optional
+            builds the system, must be a module level function (default is mars_scenario). Its `version`
+            attribute, if any, is part of the cache key: increase it when the scenario changes.
+        scenario_seed : int, optional
+            seed of the scenario, see evaluate (default is 0).
+        workers : int, optional
+            number of worker processes (default is the number of CPUs).
+        cache_path : str, optional
+            JSON file caching the evaluations, None disables the cache.
+        seed : int, optional
+            seed of the sampling.
+        """
+        self.space = dict(space if space is not None else PARAMETER_SPACE)
+        self.budget = budget
+        self.batch_size = batch_size
+        self.elite_fraction = elite_fraction
+        self.n_steps = n_steps
+        self.time_delta = time_delta
+        self.scenario = scenario
+        self.scenario_seed = scenario_seed
+        self.workers = workers
+        self.cache_path = cache_path
+        self.history = []
+
+        self._rng = np.random.default_rng(seed)
+        self._cache = {}
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self._cache = json.load(f)
+
+    def _key(self, params: dict[str, float]) -> str:
+        rounded = {name: float(f"{value:.6g}") for name, value in params.items()}
+        return json.dumps({"params": rounded, "n_steps": self.n_steps, "time_delta": self.time_delta,
+                           "scenario": f"{self.scenario.__module__}.{self.scenario.__qualname__}",
+                           "scenario_version": getattr(self.scenario, "version", 0),
+                           "scenario_seed": self.scenario_seed, "evaluation_version": _EVALUATION_VERSION},
+                          sort_keys=True)
+
+    def evaluate_many(self, candidates: list[dict[str, float]]) -> list[Evaluation]:
+        """Evaluates the candidates, simulating in parallel only the ones not in the cache."""
+        keys = [self._key(params) for params in candidates]
+        missing = {key: params for key, params in zip(keys, candidates) if key not in self._cache}
+
+        if missing:
+            context = multiprocessing.get_context("spawn")  # the parent may already run pygame and the JVM
+            with ProcessPoolExecutor(self.workers, mp_context=context) as executor:
+                futures = {key: executor.submit(evaluate, params, self.n_steps, self.time_delta, self.scenario,
+                                                 self.scenario_seed)
+                           for key, params in missing.items()}
+                for key, future in futures.items():
+                    self._cache[key] = asdict(future.result())
+            self._save_cache()
+
+        return [Evaluation(**self._cache[key]) for key in keys]
+
+    def _save_cache(self):
+        if self.cache_path is None:
+            return
+        with open(self.cache_path, "w") as f:
+            json.dump(self._cache, f)
+
+    def run(self) -> Evaluation:
+        """Runs the search until the budget is exhausted, returns the best evaluation."""
+        names = list(self.space)
+        low = np.array([self.space[name][0] for name in names], dtype=float)
+        high = np.array([self.space[name][1] for name in names], dtype=float)
+
+        # sampling distribution in the normalized space [0, 1]^d
+        mean = np.full(len(names), 0.5)
+        std = np.full(len(names), 0.3)
+        samples = []
+        while len(self.history) < self.budget:
+            n = min(self.batch_size, self.budget - len(self.history))
+            batch = np.clip(self._rng.normal(mean, std, size=(n, len(names))), 0, 1)
+            candidates = [dict(zip(names, (low + unit * (high - low)).tolist())) for unit in batch]
+            self.history.extend(self.evaluate_many(candidates))
+            samples.extend(batch)
+
+            # refit on the elite
+            scores = np.array([evaluation.score for evaluation in self.history])
+            n_elite = max(2, int(len(scores) * self.elite_fraction))
+            elite = np.array(samples)[np.argsort(scores)[::-1][:n_elite]]
+            mean = elite.mean(axis=0)
+            std = np.maximum(elite.std(axis=0), 0.02)
+
+        return self.best
+
+    @property
+    def best(self) -> Evaluation:
+        """Best evaluation so far."""
+        return max(self.history, key=lambda evaluation: evaluation.score)
@@ -0,0 +1,289 @@
+from __future__ import annotations
+import os
+import copy
+import queue
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from src.body import Body, System
+from src.contact_plan import obstructed_paths
+from src.shadow import ShadowModel
+
+
+# columns of the shared satellite state: inputs written by the main process, outputs written by the workers
+_IN = ("connections", "attempted_connections", "sunlit")
+_OUT = ("x", "y", "vel_x", "vel_y", "altitude", "battery", "transmitting", "_boosting_periapsis", "_boosting_apoapsis")
+# full satellite state returned by the workers when they stop
+_STATE = _OUT + ("_periapsis_booster_steps", "_apoapsis_booster_steps", "_periapasis", "_apoapsis",
+                 "_at_periapasis", "_at_apoapsis")
+
+_STEP, _STOP = 0, 1
+
+
+def _attach(name: str, shape: tuple) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def _worker(names, n_satellites, bodies, satellites, start, shadow, barrier, results):
+    """Worker process: propagates satellites[start:start + len(satellites)] at each step."""
+    body_shm, body_pos = _attach(names[0], (len(bodies), 2))
+    sat_shm, sat_state = _attach(names[1], (n_satellites, len(_IN) + len(_OUT)))
+    control_shm, control = _attach(names[2], (2,))
+
+    # satellites reference the bodies by index, link them to the local copies
+    for sat in satellites:
+        sat.orbit_target = bodies[sat.orbit_target] if sat.orbit_target is not None else None
+        sat.sun = bodies[sat.sun] if sat.sun is not None else None
+        sat.motherbase = bodies[sat.motherbase] if sat.motherbase is not None else None
+
+    # shadow model of the system, as (sun, occluders) indices
+    shadow_model = ShadowModel(bodies[shadow[0]], [bodies[i] for i in shadow[1]]) if shadow is not None else None
+
+    rows = sat_state[start:start + len(satellites)]
+    n_in = len(_IN)
+    try:
+        while True:
+            barrier.wait()
+            if control[0] == _STOP:
+                break
+            time_delta = control[1]
+            for body, (x, y) in zip(bodies, body_pos.tolist()):
+                body.x = x
+                body.y = y
+            inputs = rows[:, :n_in].tolist()
+            if shadow_model is None:
+                illumination = [None if sunlit < 0 else bool(sunlit) for _, _, sunlit in inputs]
+            else:
+                for sat in satellites:
+                    Body.update(sat, bodies, time_delta)
+                shadow_model.update()
+                illumination = shadow_model.illumination([(sat.x, sat.y) for sat in satellites]).tolist()
+            for i, (sat, (connections, attempted, _), sunlit) in enumerate(zip(satellites, inputs, illumination)):
+                sat.connections = int(connections)
+                sat.attempted_connections = int(attempted)
+                if shadow_model is None:
+                    sat.update(bodies, time_delta, sunlit=sunlit)
+                else:
+                    sat._subsystems_update(bodies, time_delta, sunlit=sunlit)
+                rows[i, n_in:] = (sat.x, sat.y, sat.vel_x, sat.vel_y, sat.altitude, sat.battery, sat.transmitting,
+                                  sat._boosting_periapsis, sat._boosting_apoapsis)
+            barrier.wait()
+        results.put((start, [{field: getattr(sat, field) for field in _STATE if hasattr(sat, field)}
+                             for sat in satellites]))
+    except Exception:
+        barrier.abort()  # do not leave the main process waiting
+        raise
+    finally:
+        del body_pos, sat_state, control, rows
+        body_shm.close()
+        sat_shm.close()
+        control_shm.close()
+
+
+class ParallelSystem:
+    """
+    Parallel execution mode of a System: satellites are propagated by worker processes.
+
+    Each step the main process updates the celestial bodies and publishes their positions in shared memory, then
+    computes the satellite connections (the direct motherbase paths vectorized, the relays as in System). Each worker
+    owns a contiguous slice of the satellites and propagates it (gravity, battery, altitude and boosts) reading the
+    shared arrays; main process and workers are synchronised with a barrier. If the system has a shadow model, each
+    worker classifies its satellites against it. The results are the same as System.update.
+
+    All other attributes and methods are the ones of the wrapped system, e.g. `get_sat_info`, `draw`, `run`.
+    Satellite classes must be importable by the workers, which are spawned (not forked).
+
+    Attributes
+    ----------
+    system : System
+        the wrapped system.
+    workers : int
+        number of worker processes.
+
+    Methods
+    -------
+    start()
+        Starts the workers.
+    update()
+        Updates the system, in parallel.
+    close()
+        Stops the workers and copies back the satellites state.
+    """
+
+    # seconds to wait for the workers when stopping them, before terminating them
+    timeout = 10
+
+    run = System.run
+    run_chunks = System.run_chunks
+
+    def __init__(self, system: System, workers: int | None = None):
+        """Constructor Method."""
+        self.system = system
+        self.workers = min(workers or os.cpu_count(), max(len(system.satellites), 1))
+
+        self._processes = []
+        self._shms = []
+        self._barrier = None
+        self._results = None
+
+    def __getattr__(self, name):
+        # only called for attributes not found on ParallelSystem
+        return getattr(self.__dict__["system"], name)
+
+    def start(self):
+        """Creates the shared memory and starts the workers."""
+        system = self.system
+        bodies = system.celestial_bodies
+        satellites = system.satellites
+        body_index = {id(body): i for i, body in enumerate(bodies)}
+
+        def shared(shape):
+            shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+            self._shms.append(shm)
+            return np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+        self._body_pos = shared((len(bodies), 2))
+        self._sat_state = shared((len(satellites), len(_IN) + len(_OUT)))
+        self._control = shared((2,))
+        self._body_pos[:] = [(body.x, body.y) for body in bodies]
+        n_in = len(_IN)
+        self._sat_state[:, n_in:] = [tuple(getattr(sat, field) for field in _OUT) for sat in satellites]
+
+        # static data for the vectorized motherbase paths
+        self._radii = np.array([sat.interference_factor for sat in satellites], dtype=float)[:, None] \
+            * np.array([body.radius for body in bodies], dtype=float)[None, :]
+        self._motherbase = np.array([body_index[id(sat.motherbase)] for sat in satellites], dtype=int)
+        self._excluded = self._motherbase[:, None] == np.arange(len(bodies))[None, :]
+
+        # copies sent to the workers, with references to bodies replaced by indices
+        worker_bodies = []
+        for body in bodies:
+            body_copy = copy.copy(body)
+            body_copy._orbit = None  # workers do not draw
+            worker_bodies.append(body_copy)
+        worker_sats = []
+        for sat in satellites:
+            sat_copy = copy.copy(sat)
+            sat_copy._orbit = None
+            sat_copy.relay = None
+            for name in ("orbit_target", "sun", "motherbase"):
+                target = getattr(sat, name)
+                setattr(sat_copy, name, body_index[id(target)] if target is not None else None)
+            worker_sats.append(sat_copy)
+        shadow = None
+        if system.shadow_model is not None:
+            shadow = (body_index[id(system.shadow_model.sun)],
+                      [body_index[id(body)] for body in system.shadow_model.occluders])
+
+        context = multiprocessing.get_context("spawn")
+        self._barrier = context.Barrier(self.workers + 1)
+        self._results = context.Queue()
+        names = [shm.name for shm in self._shms]
+
+        # workers must not open a window when importing src.config
+        video_driver = os.environ.get("SDL_VIDEODRIVER")
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        try:
+            for indices in np.array_split(np.arange(len(satellites)), self.workers):
+                start = int(indices[0]) if len(indices) else 0
+                process = context.Process(target=_worker, daemon=True,
+                                          args=(names, len(satellites), worker_bodies,
+                                                worker_sats[start:start + len(indices)], start, shadow,
+                                                self._barrier, self._results))
+                process.start()
+                self._processes.append(process)
+        finally:
+            if video_driver is None:
+                del os.environ["SDL_VIDEODRIVER"]
+            else:
+                os.environ["SDL_VIDEODRIVER"] = video_driver
+
+    def update(self):
+        """Updates the positions and the velocities of all the bodies in the system, same as System.update."""
+        system = self.system
+        bodies = system.celestial_bodies
+        satellites = system.satellites
+        n_in = len(_IN)
+
+        for body in bodies:
+            body.update(bodies, system.time_delta)
+        self._body_pos[:] = [(body.x, body.y) for body in bodies]
+
+        # connections, with the direct paths to the motherbase computed at once
+        system._visibility.clear()
+        if system.contact_plan is None and satellites:
+            sat_pos = self._sat_state[:, n_in:n_in + 2]
+            obstructed = obstructed_paths(sat_pos, self._body_pos[self._motherbase], self._body_pos, self._radii,
+                                          self._excluded)
+            for sat, blocked in zip(satellites, obstructed.tolist()):
+                system._visibility[(sat, sat.motherbase)] = blocked
+        system._satellite_connection()
+
+        self._sat_state[:, 0] = [sat.connections for sat in satellites]
+        self._sat_state[:, 1] = [sat.attempted_connections for sat in satellites]
+        if system.contact_plan is None or system.shadow_model is not None:
+            self._sat_state[:, 2] = -1
+        else:
+            time = system.time + system.time_delta
+            self._sat_state[:, 2] = [-1 if sunlit is None else sunlit
+                                     for sunlit in (system.contact_plan.is_sunlit(sat, time) for sat in satellites)]
+
+        # workers propagate the satellites
+        self._control[:] = (_STEP, system.time_delta)
+        self._barrier.wait()
+        self._barrier.wait()
+
+        for sat, values in zip(satellites, self._sat_state[:, n_in:].tolist()):
+            sat.x, sat.y, sat.vel_x, sat.vel_y, sat.altitude, sat.battery = values[:6]
+            sat.transmitting = bool(values[6])
+            sat._boosting_periapsis = bool(values[7])
+            sat._boosting_apoapsis = bool(values[8])
+
+        system.steps += 1
+        if system.conjunction_screener is not None:
+            system.conjunction_screener.step(system.time, system.time_delta)
+
+    def close(self):
+        """
+        Stops the workers, copies the full satellites state back to the system and frees the shared memory.
+
+        If a worker failed (broken barrier) or does not answer within `timeout`, the state is not copied back and the
+        remaining workers are terminated; the shared memory is freed in any case.
+        """
+        if not self._shms:
+            return
+        try:
+            if self._processes:
+                self._control[0] = _STOP
+                self._barrier.wait(self.timeout)
+                states = [self._results.get(timeout=self.timeout) for _ in self._processes]
+                for start, sat_states in states:
+                    for sat, state in zip(self.system.satellites[start:], sat_states):
+                        for field, value in state.items():
+                            setattr(sat, field, value)
+        except (threading.BrokenBarrierError, queue.Empty):
+            self._barrier.abort()  # release the workers still waiting
+        finally:
+            for process in self._processes:
+                process.join(self.timeout)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            self._processes = []
+            self._results.close()
+            self._barrier = self._results = None
+
+            del self._body_pos, self._sat_state, self._control
+            for shm in self._shms:
+                shm.close()
+                shm.unlink()
+            self._shms = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,163 @@
+from __future__ import annotations
+import numpy as np
+from src.config import *
+
+
+class TextCache:
+    """
+    Caches rendered text surfaces, a text is rendered again only when it changes.
+
+    Each text is identified by a slot (e.g. the index of the line on the screen).
+    """
+
+    def __init__(self, font=FONT, antialias=True):
+        """Constructor Method."""
+        self.font = font
+        self.antialias = antialias
+        self._surfaces = {}  # slot -> (text, color, surface)
+
+    def render(self, slot, text: str, color: Color = WHITE):
+        """Returns the surface of the text, rendering it only if the slot content changed."""
+        cached = self._surfaces.get(slot)
+        if cached is None or cached[0] != text or cached[1] != color:
+            cached = (text, color, self.font.render(text, self.antialias, color))
+            self._surfaces[slot] = cached
+        return cached[2]
+
+
+class Renderer:
+    """
+    Focused rendering of a system, with viewport culling, level of detail and dirty-rect display updates.
+
+    Each frame only the regions drawn in the previous frame are restored from the background and only the regions
+    that changed are sent to the display; when these regions are many or cover more than the window, the whole window
+    is restored or updated at once. Bodies and connections outside the window are skipped. When more than
+    `lod_threshold` satellites are in view, satellites are drawn as single pixels and their connections are omitted.
+    Connection colors reuse the visibility computed by the system during the step.
+
+    Attributes
+    ----------
+    window : pygame.Surface
+        the surface to draw on.
+    background : pygame.Surface | None
+        background image, if None the background is black.
+    lod_threshold : int
+        maximum number of satellites in view drawn in full detail.
+
+    Methods
+    -------
+    begin()
+        Starts a new frame, erasing what was drawn in the previous one.
+    draw_system(system, focus)
+        Draws the system centered around the focus.
+    draw_text(slot, text, position)
+        Draws a text, re-rendering it only if changed.
+    end()
+        Updates the changed regions of the display.
+    """
+
+    # above this number of dirty regions a single bounding region is updated
+    max_dirty_rects = 64
+
+    def __init__(self, window, background=None, lod_threshold=500, font=FONT):
+        """Constructor Method."""
+        self.window = window
+        self.background = background
+        self.lod_threshold = lod_threshold
+        self.text_cache = TextCache(font)
+
+        self._viewport = window.get_rect()
+        self._previous_rects = []
+        self._rects = []
+        self._first_frame = True
+
+    def begin(self):
+        """Starts a new frame, restoring the background where the previous frame drew."""
+        rects = [self._viewport] if self._first_frame else self._merge(self._previous_rects)
+        for rect in rects:
+            if self.background is not None:
+                self.window.blit(self.background, rect, rect)
+            else:
+                self.window.fill(BLACK, rect)
+        self._rects = []
+
+    def end(self):
+        """Updates the regions of the display changed since the previous frame."""
+        if self._first_frame:
+            pygame.display.update()
+            self._first_frame = False
+        else:
+            dirty = self._merge(self._previous_rects + self._rects)
+            if dirty:
+                pygame.display.update(dirty)
+        self._previous_rects = self._rects
+
+    def draw_system(self, system, focus: Body):
+        """Draws the bodies, satellites and connections of the system centered around the focus."""
+        scale = system.focus_scale
+        cx = WIDTH / 2 - focus.x * scale
+        cy = HEIGHT / 2 - focus.y * scale
+
+        for body in system.celestial_bodies:
+            x = body.x * scale + cx
+            y = body.y * scale + cy
+            radius = RADIUS_RESIZE(body.radius) * RADIUS_SCALE
+            if self._in_view(x - radius, y - radius, x + radius, y + radius):
+                self._rects.append(pygame.draw.circle(self.window, body.color, (x, y), radius))
+
+        if not system.satellites:
+            return
+        sat_x = np.fromiter((sat.x for sat in system.satellites), float, len(system.satellites)) * scale + cx
+        sat_y = np.fromiter((sat.y for sat in system.satellites), float, len(system.satellites)) * scale + cy
+        visible = (sat_x >= 0) & (sat_x < WIDTH) & (sat_y >= 0) & (sat_y < HEIGHT)
+        n_visible = np.count_nonzero(visible)
+
+        if n_visible > self.lod_threshold:
+            self._draw_points(system, sat_x, sat_y, visible)
+            return
+
+        # full detail: connections (when on screen) and satellites
+        for i, sat in enumerate(system.satellites):
+            target = sat.relay if sat.relay is not None else sat.motherbase
+            x2 = target.x * scale + cx
+            y2 = target.y * scale + cy
+            if not self._in_view(min(sat_x[i], x2), min(sat_y[i], y2), max(sat_x[i], x2), max(sat_y[i], y2)):
+                continue
+            color = RED if system.path_obstructed(sat, target) else GREEN
+            self._rects.append(pygame.draw.line(self.window, color, (sat_x[i], sat_y[i]), (x2, y2), 1))
+        for i in np.flatnonzero(visible):
+            sat = system.satellites[i]
+            radius = RADIUS_RESIZE(sat.radius) * RADIUS_SCALE
+            self._rects.append(pygame.draw.circle(self.window, sat.color, (sat_x[i], sat_y[i]), radius))
+
+    def draw_text(self, slot, text: str, position: tuple[int, int], color: Color = WHITE):
+        """Draws a text at the position, the surface is rendered again only if the text changed."""
+        surface = self.text_cache.render(slot, text, color)
+        self._rects.append(self.window.blit(surface, position))
+
+    def _draw_points(self, system, sat_x: np.ndarray, sat_y: np.ndarray, visible: np.ndarray):
+        """Low detail: writes one pixel per visible satellite, directly in the surface pixels."""
+        idx = np.flatnonzero(visible)
+        px = sat_x[idx].astype(int)
+        py = sat_y[idx].astype(int)
+        colors = np.array([system.satellites[i].color for i in idx], dtype=np.uint8)
+
+        pixels = pygame.surfarray.pixels3d(self.window)
+        pixels[px, py] = colors
+        del pixels  # unlock the surface
+
+        left, top = px.min(), py.min()
+        self._rects.append(pygame.Rect(left, top, px.max() - left + 1, py.max() - top + 1))
+
+    def _in_view(self, left: float, top: float, right: float, bottom: float) -> bool:
+        return right >= 0 and left < WIDTH and bottom >= 0 and top < HEIGHT
+
+    def _merge(self, rects: list) -> list:
+        """Regions clipped to the window, a single one if they are too many or cover more than the window."""
+        rects = [rect.clip(self._viewport) for rect in rects]
+        rects = [rect for rect in rects if rect.width and rect.height]
+        if sum(rect.width * rect.height for rect in rects) >= self._viewport.width * self._viewport.height:
+            return [self._viewport]
+        if len(rects) > self.max_dirty_rects:
+            return [rects[0].unionall(rects[1:])]
+        return rects
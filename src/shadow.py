@@ -0,0 +1,103 @@
+from __future__ import annotations
+import numpy as np
+
+
+class ShadowModel:
+    """
+    Shadows cast by the celestial bodies, to compute the illumination of many satellites at once.
+
+    At each step (update) the shadow of each occluder is set up once: axis from the sun, apex distances and radii of
+    the umbra and penumbra cones. Points are then classified against all the shadows in one vectorized pass: points
+    outside every penumbra cone are fully lit, points inside an umbra are dark, and only the points in a penumbra need
+    the illuminated fraction of the sun, computed as the part of the (angular) sun segment not covered by the occluder.
+    With several occluders the darkest one is kept.
+
+    Attributes
+    ----------
+    sun : Body
+        the light source.
+    occluders : list[Body]
+        bodies casting shadows.
+
+    Methods
+    -------
+    update()
+        Sets up the shadows for the current positions of the sun and the occluders.
+    illumination(points)
+        Illuminated fraction of the sun seen from each point, between 0 (umbra) and 1 (full sun).
+    """
+
+    def __init__(self, sun, occluders: list):
+        """Constructor Method."""
+        self.sun = sun
+        self.occluders = [body for body in occluders if body is not sun]
+        self._radii = np.array([body.radius for body in self.occluders], dtype=float)
+        self.update()
+
+    def update(self):
+        """Sets up the umbra and penumbra cones of each occluder, to be called once per step after the bodies moved."""
+        self._sun_pos = np.array([self.sun.x, self.sun.y], dtype=float)
+        self._pos = np.array([(body.x, body.y) for body in self.occluders], dtype=float).reshape(-1, 2)
+        sun_radius = self.sun.radius
+        offset = self._pos - self._sun_pos
+        distance = np.hypot(*offset.T)
+        self._axis = offset / distance[:, None]
+
+        # distance of the penumbra apex in front of the occluder and of the umbra apex behind it
+        self._penumbra_apex = distance * self._radii / (sun_radius + self._radii)
+        with np.errstate(divide="ignore"):
+            self._umbra_apex = np.where(sun_radius > self._radii, distance * self._radii / (sun_radius - self._radii),
+                                        np.inf)
+
+    def illumination(self, points: np.ndarray) -> np.ndarray:
+        """
+        Illuminated fraction of the sun seen from each point.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            positions, shape (points, 2).
+
+        Returns
+        -------
+        np.ndarray
+            illumination between 0 and 1, shape (points,).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        lit = np.ones(len(points))
+        if not self.occluders:
+            return lit
+
+        # position relative to each shadow axis, shape (points, occluders)
+        relative = points[:, None, :] - self._pos[None, :, :]
+        along = np.sum(relative * self._axis, axis=2)
+        across = np.abs(relative[..., 0] * self._axis[:, 1] - relative[..., 1] * self._axis[:, 0])
+
+        penumbra_radius = self._radii * (along + self._penumbra_apex) / self._penumbra_apex
+        umbra_radius = self._radii * (1 - along / self._umbra_apex)
+        shaded = (along > -self._penumbra_apex) & (across < penumbra_radius)
+        umbra = shaded & (along > 0) & (across <= umbra_radius)
+        partial = shaded & ~umbra
+
+        lit[umbra.any(axis=1)] = 0
+        if partial.any():
+            i, j = np.nonzero(partial)
+            lit_partial = self._partial_illumination(points[i], j)
+            np.minimum.at(lit, i, lit_partial)
+        return lit
+
+    def _partial_illumination(self, points: np.ndarray, occluders: np.ndarray) -> np.ndarray:
+        """Part of the sun, as an angular segment seen from the points, not covered by the occluders."""
+        to_sun = self._sun_pos - points
+        to_occluder = self._pos[occluders] - points
+        sun_distance = np.hypot(*to_sun.T)
+        occluder_distance = np.hypot(*to_occluder.T)
+        sun_half_angle = np.arcsin(np.minimum(self.sun.radius / sun_distance, 1))
+        occluder_half_angle = np.arcsin(np.minimum(self._radii[occluders] / occluder_distance, 1))
+
+        # angle of the occluder from the direction of the sun
+        angle = np.arctan2(to_sun[:, 0] * to_occluder[:, 1] - to_sun[:, 1] * to_occluder[:, 0],
+                           np.sum(to_sun * to_occluder, axis=1))
+        covered = np.minimum(sun_half_angle, angle + occluder_half_angle) \
+            - np.maximum(-sun_half_angle, angle - occluder_half_angle)
+        return 1 - np.clip(covered / (2 * sun_half_angle), 0, 1)
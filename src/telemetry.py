@@ -0,0 +1,298 @@
+from __future__ import annotations
+import asyncio
+import struct
+import threading
+from dataclasses import dataclass
+import numpy as np
+
+
+# wire format (little endian):
+#   hello (client -> server): uint16 decimation (of the frames published by the server)
+#   frame (server -> client): header (uint64 step, float64 time, uint32 n_satellites) followed by n_satellites records
+_HELLO = struct.Struct("<H")
+_FRAME_HEADER = struct.Struct("<QdI")
+RECORD_DTYPE = np.dtype([
+    ("x", "<f8"),
+    ("y", "<f8"),
+    ("vel_x", "<f4"),
+    ("vel_y", "<f4"),
+    ("altitude", "<f4"),
+    ("battery", "<f4"),
+    ("connections", "<u4"),
+    ("attempted_connections", "<u4"),
+    ("boosting", "?"),
+])
+
+
+@dataclass
+class TelemetryFrame:
+    """Satellite state at one simulation step, as received by a ground station."""
+    step: int
+    time: float
+    satellites: np.ndarray  # structured array with RECORD_DTYPE
+
+
+def pack_frame(step: int, time: float, satellites: list) -> bytes:
+    """
+    Encodes the state of the satellites in a binary frame.
+
+    Parameters
+    ----------
+    step : int
+        simulation step of the frame.
+    time : float
+        simulated time of the frame in s.
+    satellites : list[Satellite]
+        satellites to encode.
+
+    Returns
+    -------
+    bytes
+        the encoded frame.
+    """
+    records = np.array([(sat.x, sat.y, sat.vel_x, sat.vel_y, sat.altitude, sat.battery,
+                         sat.connections, sat.attempted_connections, sat.boosting) for sat in satellites],
+                       dtype=RECORD_DTYPE)
+    return _FRAME_HEADER.pack(step, time, len(records)) + records.tobytes()
+
+
+class _Subscriber:
+    """
+    Bounded frame queue of a connected client, keeping one published frame every `decimation`. Oldest frames are
+    dropped when the client falls behind.
+    """
+
+    def __init__(self, server: TelemetryServer, decimation: int, max_queue: int):
+        self.server = server
+        self.decimation = decimation
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.offered = 0
+
+    def offer(self, frame: bytes):
+        self.offered += 1
+        if (self.offered - 1) % self.decimation:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.server._dropped += 1
+        self.queue.put_nowait(frame)
+
+
+class TelemetryServer:
+    """
+    Streams the satellites state to any number of ground station clients.
+
+    The server runs an asyncio event loop in a background thread. The simulation loop only encodes the frame and hands
+    it over to the event loop, so it never waits on the network: each client has a bounded queue and, if it cannot keep
+    up, the oldest frames in its queue are discarded.
+
+    Attributes
+    ----------
+    host, port : str, int
+        TCP address the server listens on (ignored if path is given).
+    path : str | None
+        path of the unix socket to listen on, instead of TCP.
+    decimation : int
+        only one step every `decimation` is published.
+    max_queue : int
+        maximum number of frames buffered for each client.
+
+    Methods
+    -------
+    start()
+        Starts the server in a background thread.
+    publish(system)
+        Publishes the current state of the satellites of the system.
+    stop()
+        Stops the server and disconnects all clients.
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 8765,
+                 path: str | None = None,
+                 decimation: int = 1,
+                 max_queue: int = 64,
+                 ):
+        """Constructor Method."""
+        self.host = host
+        self.port = port
+        self.path = path
+        self.decimation = decimation
+        self.max_queue = max_queue
+
+        self._subscribers = set()
+        self._dropped = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self):
+        """
+        Starts the server in a background thread, returns once it is listening.
+
+        Raises
+        ------
+        OSError
+            if the server cannot listen on the address (e.g. the port is in use).
+        """
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._serve, name="telemetry", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._error
+
+    def stop(self):
+        """Stops the server and disconnects all clients."""
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def publish(self, system):
+        """Publishes the current state of the satellites of the system. Never blocks on the clients."""
+        if self._loop is None or not self._subscribers or system.steps % self.decimation:
+            return
+        frame = pack_frame(system.steps, system.time, system.satellites)
+        self._loop.call_soon_threadsafe(self._dispatch, frame)
+
+    @property
+    def dropped_frames(self) -> int:
+        """Number of frames discarded because of slow clients, since the start."""
+        return self._dropped
+
+    def _dispatch(self, frame: bytes):
+        for sub in self._subscribers:
+            sub.offer(frame)
+
+    def _serve(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            if self.path is not None:
+                self._server = loop.run_until_complete(asyncio.start_unix_server(self._handle, self.path))
+            else:
+                self._server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            self._loop = loop
+        except Exception as e:  # reported by start
+            self._error = e
+            loop.close()
+            return
+        finally:
+            self._ready.set()
+
+        self._loop.run_forever()
+
+        # shutdown: stop listening and close the client connections
+        self._server.close()
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            (decimation,) = _HELLO.unpack(await reader.readexactly(_HELLO.size))
+        except asyncio.IncompleteReadError:
+            writer.close()
+            return
+
+        sub = _Subscriber(self, max(decimation, 1), self.max_queue)
+        self._subscribers.add(sub)
+        try:
+            while True:
+                frame = await sub.queue.get()
+                writer.write(frame)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):  # client left or server shutting down
+            pass
+        finally:
+            self._subscribers.discard(sub)
+            writer.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class GroundStationClient:
+    """
+    Mock ground station, receives the frames streamed by a TelemetryServer.
+
+    Methods
+    -------
+    connect()
+        Connects to the server.
+    frames()
+        Asynchronously iterates over the received frames.
+    close()
+        Closes the connection.
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 8765,
+                 path: str | None = None,
+                 decimation: int = 1,
+                 ):
+        """
+        Constructor Method.
+
+        Parameters
+        ----------
+        host, port : str, int
+            TCP address of the server (ignored if path is given).
+        path : str, optional
+            path of the unix socket of the server.
+        decimation : int, optional
+            only receive one frame every `decimation` frames published by the server (default is 1).
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.decimation = decimation
+        self._reader = None
+        self._writer = None
+
+    async def connect(self):
+        """Connects to the server and subscribes to the telemetry."""
+        if self.path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(_HELLO.pack(self.decimation))
+        await self._writer.drain()
+
+    async def frames(self):
+        """Yields the received frames until the server closes the connection."""
+        while True:
+            try:
+                header = await self._reader.readexactly(_FRAME_HEADER.size)
+                step, time, n_satellites = _FRAME_HEADER.unpack(header)
+                body = await self._reader.readexactly(n_satellites * RECORD_DTYPE.itemsize)
+            except asyncio.IncompleteReadError:
+                return
+            yield TelemetryFrame(step, time, np.frombuffer(body, dtype=RECORD_DTYPE))
+
+    async def close(self):
+        """Closes the connection."""
+        self._writer.close()
+        await self._writer.wait_closed()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
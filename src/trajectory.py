@@ -0,0 +1,275 @@
+from __future__ import annotations
+import os
+import json
+import numpy as np
+
+
+_INDEX = "index.json"
+_BOUNDS = "bounds.npy"
+
+
+class TrajectoryWriter:
+    """
+    Writes the positions of a set of bodies to an on-disk trajectory store during a simulation.
+
+    Positions are buffered and written in chunks of `chunk_size` records, one .npy file per chunk (plus one for the
+    times). After each chunk the index is updated: time range of every chunk and bounding box of every body in every
+    chunk. Read the store with TrajectoryStore.
+
+    Attributes
+    ----------
+    path : str
+        directory of the store.
+    names : list[str]
+        names of the recorded bodies.
+
+    Methods
+    -------
+    record(system)
+        Records the current positions, to be called after each System.update.
+    append(time, positions)
+        Records the given positions.
+    close()
+        Writes the last, partial, chunk.
+    """
+
+    def __init__(self, path: str, bodies: list, chunk_size=4096, every=1, dtype=np.float64):
+        """
+        Constructor Method.
+
+        Parameters
+        ----------
+        path : str
+            directory of the store, created if missing.
+        bodies : list[Body]
+            bodies to record, they are identified by name (or index, if they have no name).
+        chunk_size : int, optional
+            number of records in each chunk file (default is 4096).
+        every : int, optional
+            `record` keeps one step every `every` (default is 1).
+        dtype : np.dtype, optional
+            type of the stored positions (default is np.float64, float32 is not precise enough for positions
+            measured from the sun).
+        """
+        self.path = path
+        self.bodies = list(bodies)
+        self.names = [body.name if body.name is not None else str(i) for i, body in enumerate(self.bodies)]
+        self.chunk_size = chunk_size
+        self.every = every
+        self.dtype = dtype
+
+        os.makedirs(path, exist_ok=True)
+        self._times = np.empty(chunk_size)
+        self._positions = np.empty((chunk_size, len(self.bodies), 2), dtype=dtype)
+        self._filled = 0
+        self._chunks = []  # (time file, positions file, first time, last time, records)
+        self._bounds = []  # (bodies, 4) bounding boxes: x_min, y_min, x_max, y_max
+
+    def record(self, system):
+        """Records the current positions of the bodies, once every `every` steps."""
+        if system.steps % self.every == 0:
+            self.append(system.time, [(body.x, body.y) for body in self.bodies])
+
+    def append(self, time: float, positions):
+        """Records the positions, shape (bodies, 2), at the time."""
+        self._times[self._filled] = time
+        self._positions[self._filled] = positions
+        self._filled += 1
+        if self._filled == self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._filled:
+            return
+        k = len(self._chunks)
+        times = self._times[:self._filled]
+        positions = self._positions[:self._filled]
+        time_file, positions_file = f"chunk_{k:05d}_time.npy", f"chunk_{k:05d}.npy"
+        np.save(os.path.join(self.path, time_file), times)
+        np.save(os.path.join(self.path, positions_file), positions)
+
+        self._chunks.append((time_file, positions_file, float(times[0]), float(times[-1]), self._filled))
+        self._bounds.append(np.concatenate([positions.min(axis=0), positions.max(axis=0)], axis=1))
+        self._filled = 0
+
+        # the index is rewritten after each chunk, so the store is readable during the simulation
+        np.save(os.path.join(self.path, _BOUNDS), np.array(self._bounds, dtype=np.float64))
+        with open(os.path.join(self.path, _INDEX), "w") as f:
+            json.dump({"names": self.names, "chunks": self._chunks}, f)
+
+    def close(self):
+        """Writes the buffered records."""
+        self._flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryStore:
+    """
+    Reads a trajectory store written by TrajectoryWriter, without loading it in memory.
+
+    Chunks are memory-mapped and only the ones overlapping the queried time range are touched; proximity queries also
+    skip the chunks in which the bounding boxes of the two bodies are farther than the distance.
+
+    Attributes
+    ----------
+    names : list[str]
+        names of the recorded bodies.
+    start, end : float
+        first and last recorded time in s.
+
+    Methods
+    -------
+    position(name, time)
+        Position of a body at a time, linearly interpolated.
+    range(name, start, end)
+        Recorded positions of a body in a time range.
+    proximity(first, second, distance)
+        Time intervals in which two bodies are closer than the distance.
+    """
+
+    def __init__(self, path: str):
+        """Constructor Method."""
+        self.path = path
+        with open(os.path.join(path, _INDEX)) as f:
+            index = json.load(f)
+        self.names = index["names"]
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._chunks = index["chunks"]
+        self._first = np.array([chunk[2] for chunk in self._chunks])
+        self._last = np.array([chunk[3] for chunk in self._chunks])
+        self._bounds = np.load(os.path.join(path, _BOUNDS), mmap_mode="r")
+        self._cache = {}
+
+    @property
+    def start(self) -> float:
+        return float(self._first[0])
+
+    @property
+    def end(self) -> float:
+        return float(self._last[-1])
+
+    def _chunk(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        if k not in self._cache:
+            time_file, positions_file = self._chunks[k][:2]
+            self._cache[k] = (np.load(os.path.join(self.path, time_file), mmap_mode="r"),
+                              np.load(os.path.join(self.path, positions_file), mmap_mode="r"))
+        return self._cache[k]
+
+    def _chunks_between(self, start: float, end: float) -> range:
+        """Indices of the chunks overlapping [start, end]."""
+        return range(int(np.searchsorted(self._last, start, side="left")),
+                     int(np.searchsorted(self._first, end, side="right")))
+
+    def position(self, name: str, time: float) -> np.ndarray:
+        """
+        Position of the body at the time, linearly interpolated between the two closest records.
+
+        Parameters
+        ----------
+        name : str
+            name of the body.
+        time : float
+            time in s, within [start, end].
+
+        Returns
+        -------
+        np.ndarray
+            x and y coordinates in m.
+        """
+        if not self.start <= time <= self.end:
+            raise ValueError(f"time {time} is outside the recorded range [{self.start}, {self.end}]")
+        body = self._index[name]
+
+        # records before and after the time, possibly in two different chunks
+        k = int(np.searchsorted(self._last, time, side="left"))
+        times, positions = self._chunk(k)
+        i = int(np.searchsorted(times, time, side="left"))
+        if times[i] == time:
+            return np.array(positions[i, body], dtype=np.float64)
+        if i > 0:
+            t0, p0 = times[i - 1], positions[i - 1, body]
+        else:
+            previous_times, previous_positions = self._chunk(k - 1)
+            t0, p0 = previous_times[-1], previous_positions[-1, body]
+        t1, p1 = times[i], positions[i, body]
+        w = (time - t0) / (t1 - t0)
+        return (1 - w) * np.asarray(p0, dtype=np.float64) + w * np.asarray(p1, dtype=np.float64)
+
+    def range(self, name: str, start: float, end: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Recorded positions of the body in the time range.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            times with shape (records,) and positions with shape (records, 2).
+        """
+        body = self._index[name]
+        all_times, all_positions = [], []
+        for k in self._chunks_between(start, end):
+            times, positions = self._chunk(k)
+            i, j = int(np.searchsorted(times, start, side="left")), int(np.searchsorted(times, end, side="right"))
+            all_times.append(np.asarray(times[i:j]))
+            all_positions.append(np.asarray(positions[i:j, body], dtype=np.float64))
+        if not all_times:
+            return np.empty(0), np.empty((0, 2))
+        return np.concatenate(all_times), np.concatenate(all_positions)
+
+    def proximity(self, first: str, second: str, distance: float,
+                  start: float | None = None, end: float | None = None) -> list[tuple[float, float, float]]:
+        """
+        Time intervals in which the two bodies are closer than the distance (evaluated on the records).
+
+        Parameters
+        ----------
+        first, second : str
+            names of the bodies.
+        distance : float
+            distance in m.
+        start, end : float, optional
+            time range of the query (default is the whole store).
+
+        Returns
+        -------
+        list[tuple[float, float, float]]
+            first and last time of each close record sequence and the minimum distance within it.
+        """
+        start = self.start if start is None else start
+        end = self.end if end is None else end
+        a, b = self._index[first], self._index[second]
+
+        intervals = []
+        previous_close = False
+        for k in self._chunks_between(start, end):
+            # skip the chunk if the bounding boxes are too far apart
+            box_a, box_b = self._bounds[k, a], self._bounds[k, b]
+            gap = np.maximum(0, np.maximum(box_a[:2] - box_b[2:], box_b[:2] - box_a[2:]))
+            if np.hypot(*gap) >= distance:
+                previous_close = False
+                continue
+
+            times, positions = self._chunk(k)
+            i, j = int(np.searchsorted(times, start, side="left")), int(np.searchsorted(times, end, side="right"))
+            times = np.asarray(times[i:j])
+            d = np.hypot(*(np.asarray(positions[i:j, a], dtype=np.float64)
+                           - np.asarray(positions[i:j, b], dtype=np.float64)).T)
+            close = d < distance
+            if not close.any():
+                previous_close = False
+                continue
+
+            # runs of close records
+            edges = np.diff(np.concatenate([[0], close.astype(np.int8), [0]]))
+            for run_start, run_end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+                interval = (float(times[run_start]), float(times[run_end - 1]), float(d[run_start:run_end].min()))
+                if run_start == 0 and previous_close:  # continues from the previous chunk
+                    last = intervals.pop()
+                    interval = (last[0], interval[1], min(last[2], interval[2]))
+                intervals.append(interval)
+            previous_close = bool(close[-1])
+        return intervals